@@ -1,7 +1,128 @@
+import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from metrics import trade_metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever trade generation or metrics change meaning, so stored results (result_store.py) are recomputed
+ENGINE_VERSION = 1
+
+TRADE_COLUMNS = ["Signal", "Entry Date", "Entry Price", "Exit Date", "Exit Price",
+                 "PnL", "Return (%)", "Capital Deployed", "Equity"]
+
+
+def fixed_holding_trades(close, signal, holding_days=5, initial_capital=100000):
+    # Array engine behind backtest_fixed_holding. Takes Close and signal as aligned 1-D arrays and
+    # returns trades as a dict of column arrays (entry/exit are row positions, not dates).
+    close = np.asarray(close, dtype=np.float64)
+    signal = np.asarray(signal)
+    n = len(close)
+
+    entries = np.flatnonzero((signal == 1) | (signal == -1))
+    exits = entries + holding_days
+    # Candidates are sorted, so once one exits past the last bar every later one does too
+    entries = entries[:np.searchsorted(exits, n)]
+    exits = exits[:len(entries)]
+
+    return compound_trades(entries, exits, signal[entries].astype(np.int8), close[entries], close[exits],
+                           initial_capital)
+
+
+def compound_trades(entries, exits, sides, entry_prices, exit_prices, initial_capital=100000, extra=None):
+    # Picks non-overlapping trades from sorted candidate entries (each with its own exit) and sizes them
+    # with compounding capital. `extra` maps names to per-candidate arrays to carry into the output.
+    moves = np.where(sides == 1, exit_prices - entry_prices, entry_prices - exit_prices)
+    # Next candidate entering strictly after each candidate's exit (no overlapping trades)
+    next_candidate = np.searchsorted(entries, exits, side='right')
+
+    chosen, qtys, pnls, equity = [], [], [], []
+    capital = initial_capital
+    k = 0
+    # Only the compounding walk is sequential, and it visits trades rather than every signal
+    while k < len(entries):
+        qty = capital // entry_prices[k]
+        if qty == 0:
+            k += 1
+            continue
+        pnl = moves[k] * qty
+        capital += pnl
+        chosen.append(k)
+        qtys.append(qty)
+        pnls.append(pnl)
+        equity.append(capital)
+        k = next_candidate[k]
+
+    chosen = np.asarray(chosen, dtype=np.intp)
+    qtys = np.asarray(qtys, dtype=np.float64)
+    pnls = np.asarray(pnls, dtype=np.float64)
+    capital_deployed = qtys * entry_prices[chosen]
+    trades = {
+        "entry_pos": entries[chosen],
+        "exit_pos": exits[chosen],
+        "side": sides[chosen],
+        "entry_price": entry_prices[chosen],
+        "exit_price": exit_prices[chosen],
+        "qty": qtys,
+        "pnl": pnls,
+        "capital_deployed": capital_deployed,
+        "return_pct": (pnls / capital_deployed) * 100,
+        "equity": np.asarray(equity, dtype=np.float64),
+    }
+    for name, values in (extra or {}).items():
+        trades[name] = values[chosen]
+    return trades
+
+
+def trades_frame(trades, dates, extra=None):
+    # Trade table (TRADE_COLUMNS, then the `extra` {column: values}) from a compound_trades dict, with row
+    # positions mapped to `dates`
+    columns = {
+        "Signal": np.where(trades["side"] == 1, "BUY", "SELL").astype(object),
+        "Entry Date": dates[trades["entry_pos"]],
+        "Entry Price": trades["entry_price"],
+        "Exit Date": dates[trades["exit_pos"]],
+        "Exit Price": trades["exit_price"],
+        "PnL": trades["pnl"],
+        "Return (%)": trades["return_pct"],
+        "Capital Deployed": trades["capital_deployed"],
+        "Equity": trades["equity"],
+        **(extra or {}),
+    }
+    return pd.DataFrame(columns, columns=list(columns))
+
+
 def backtest_fixed_holding(data, signals, holding_days=5, initial_capital=100000):
+    signals = signals.loc[data.index]
+    trades = fixed_holding_trades(data['Close'].to_numpy(), signals['signal'].to_numpy(),
+                                  holding_days=holding_days, initial_capital=initial_capital)
+    if len(trades["pnl"]) == 0:
+        return pd.DataFrame()
+    return trades_frame(trades, data.index)
+
+
+def backtest_fixed_holding_panel(panel, signals, holding_days=5, initial_capital=100000):
+    # Panel version: signals is a (dates x symbols) array aligned with the panel. Holding periods count
+    # each symbol's own bars, so dates where a symbol has no data are skipped as in the per-symbol run.
+    close = panel.fields['Close']
+    tables = []
+    for j, symbol in enumerate(panel.symbols):
+        rows = np.flatnonzero(~np.isnan(close[:, j]))
+        trades = fixed_holding_trades(close[rows, j], signals[rows, j],
+                                      holding_days=holding_days, initial_capital=initial_capital)
+        if len(trades["pnl"]):
+            tables.append(trades_frame(trades, panel.dates[rows]))
+            tables[-1].insert(0, "Symbol", symbol)
+
+    if not tables:
+        return pd.DataFrame(columns=["Symbol"] + TRADE_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+# Original per-signal loop; kept as the reference implementation for equivalence checks and benchmarks
+def backtest_fixed_holding_loop(data, signals, holding_days=5, initial_capital=100000):
     trades = []
     capital = initial_capital
     equity = capital
@@ -62,34 +183,36 @@ def backtest_fixed_holding(data, signals, holding_days=5, initial_capital=100000
             })
 
         except Exception as e:
-            print(f"⚠️ Error processing signal at {signal_date}: {e}")
+            logger.warning(f"⚠️ Error processing signal at {signal_date}: {e}")
             continue
 
     return pd.DataFrame(trades)
 
-def summarize_results(results):
-    df = pd.DataFrame(results)
-    total_trades = len(df)
-    wins = df[df['PnL'] > 0]
-    win_rate = len(wins) / total_trades * 100 if total_trades > 0 else 0
-    total_return = df['PnL'].sum()
-    capital = 100000  # fixed capital
-    return_on_capital = (total_return / capital) * 100 if capital > 0 else 0
-
-    start_date = df['Entry Date'].min()
-    end_date = df['Exit Date'].max()
-    years = (end_date - start_date).days / 365.0 if start_date and end_date else 1
-    cagr = ((1 + (total_return / capital)) ** (1 / years) - 1) * 100 if years > 0 else 0
-
-    print("\n📊 Performance Summary:")
-    print(f"Total Trades: {total_trades}")
-    print(f"Win Rate: {win_rate:.2f}%")
-    print(f"Total Return: ₹{total_return:.2f}")
-    print(f"Return on Capital: {return_on_capital:.2f}%")
-    print(f"Average Return per Trade: ₹{df['PnL'].mean():.2f}")
-    print(f"Annualized Return (CAGR): {cagr:.2f}%")
-
-    return cagr
+def summarize_results(results, initial_capital=100000):
+    if len(results) == 0:
+        raise ValueError("No trades to summarize.")
+    record = trade_metrics(results, initial_capital)
+    log_summary(record, initial_capital)
+    return record['CAGR (%)']
+
+
+def log_summary(record, initial_capital=100000, label=""):
+    # Performance summary of a trade_metrics record, logged at INFO
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n".join([
+            f"📊 Performance Summary{label}:",
+            f"Total Trades: {record['Trades']}",
+            f"Win Rate: {record['Win Rate (%)']:.2f}%",
+            f"Total Return: ₹{record['Total Return']:.2f}",
+            f"Return on Capital: {record['Total Return'] / initial_capital * 100:.2f}%",
+            f"Average Return per Trade: ₹{record['Total Return'] / record['Trades']:.2f}",
+            f"Annualized Return (CAGR): {record['CAGR (%)']:.2f}%",
+            f"Sharpe: {record['Sharpe']:.2f}  Sortino: {record['Sortino']:.2f}",
+            f"Max Drawdown: {record['Max Drawdown (%)']:.2f}%",
+            f"Exposure: {record['Exposure (%)']:.2f}%",
+            f"Profit Factor: {record['Profit Factor']:.2f}",
+            f"Average Holding Return: {record['Avg Return (%)']:.2f}%",
+        ]))
 
 
 
@@ -0,0 +1,222 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+# Headless counterpart of run_strategy.py's batch mode for scheduled and multi-node sweeps. Settings come from a
+# JSON config file and/or command-line flags; --shard i/N runs only the symbols whose stable hash falls in shard i,
+# so N boxes (or N local processes) split a universe without coordinating. Each shard writes
+# <out>/shard-<i>-of-<N>.csv plus a .json manifest, and `merge` recombines them and rebuilds the CAGR buckets.
+# Heavy modules (pandas, the strategies, the data layer) are imported only once a shard actually runs.
+
+DEFAULTS = {
+    "universe": None,  # CSV file with a 'Symbol' column
+    "symbols": None,  # or an explicit list of symbols
+    "strategies": [],  # names in strategies.STRATEGIES, combined when several are given
+    "params": {},  # {strategy name: {parameter: value}} overriding the registered parameters
+    "holding_days": 5,
+    "start": "2020-06-01",
+    "end": "2025-06-01",
+    "interval": "1d",
+    "exit_rules": {},  # backtest_exit_rules keyword arguments, e.g. {"stop_loss_pct": 3}
+    "screen": None,  # SQL filter over the screener index (see screener.py)
+    "screener": "screener.db",
+    "results": None,  # SQLite result store to reuse results from, per box
+    "workers": None,
+    "io_workers": 8,
+}
+# Settings that change results; shards of one sweep must agree on them for merge
+RESULT_SETTINGS = ("universe", "symbols", "strategies", "params", "holding_days", "start", "end", "interval",
+                   "exit_rules", "screen")
+
+
+def load_config(path=None, **overrides):
+    # Defaults, then the config file, then every override that is not None
+    config = dict(DEFAULTS)
+    if path:
+        with open(path) as f:
+            loaded = json.load(f)
+        unknown = set(loaded) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown config settings: {', '.join(sorted(unknown))}")
+        config.update(loaded)
+    config.update({name: value for name, value in overrides.items() if value is not None})
+    if not config["strategies"]:
+        raise ValueError("No strategies selected.")
+    if not config["universe"] and not config["symbols"]:
+        raise ValueError("Give a universe CSV or a list of symbols.")
+    return config
+
+
+def config_hash(config):
+    payload = json.dumps({name: config[name] for name in RESULT_SETTINGS}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def parse_shard(text):
+    # "i/N" with 0 <= i < N
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r}, expected i/N such as 0/4") from None
+    if not 0 <= index < count:
+        raise ValueError(f"Invalid shard {text!r}: i must be in [0, N)")
+    return index, count
+
+
+def shard_of(symbol, count):
+    # Stable across machines, processes and universe order (unlike the salted built-in hash)
+    return int(hashlib.sha1(symbol.encode()).hexdigest(), 16) % count
+
+
+def shard_paths(out, index, count):
+    base = os.path.join(out, f"shard-{index}-of-{count}")
+    return base + ".csv", base + ".json"
+
+
+def universe_symbols(config):
+    if config["symbols"]:
+        return list(dict.fromkeys(config["symbols"]))
+    import pandas as pd
+    return pd.read_csv(config["universe"], usecols=['Symbol'])['Symbol'].dropna().unique().tolist()
+
+
+def resolve_strategies(config):
+    from strategies import STRATEGIES
+
+    unknown = [name for name in config["strategies"] if name not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown strategies {unknown}; registered: {list(STRATEGIES)}")
+    return [(STRATEGIES[name][0], {**STRATEGIES[name][1], **config["params"].get(name, {})})
+            for name in config["strategies"]]
+
+
+def run_shard(config, index=0, count=1, out="batch_results"):
+    from functools import partial
+
+    import pandas as pd
+    from fetch_data_module import data_stamp, fetch_data
+    from metrics import METRIC_COLUMNS
+    from result_store import ResultStore
+    from screener import screen_universe
+    from sweep import run_sweep
+
+    started = time.time()
+    strategies = resolve_strategies(config)
+    universe = universe_symbols(config)
+    symbols = [symbol for symbol in universe if shard_of(symbol, count) == index]
+    loader = partial(fetch_data, start=config["start"], end=config["end"], interval=config["interval"])
+    stamp = partial(data_stamp, start=config["start"], end=config["end"], interval=config["interval"])
+    screened_out = []
+    if config["screen"]:
+        kept, failed = screen_universe(symbols, config["screen"], strategies=strategies, loader=loader,
+                                       path=config["screener"], io_workers=config["io_workers"], stamp=stamp)
+        screened_out = sorted(set(symbols) - set(kept))
+        for symbol, error in failed.items():
+            print(f"[WARNING] Error screening {symbol}: {error}")
+        symbols = kept
+    print(f"[INFO] Shard {index}/{count}: {len(symbols)} of {len(universe)} symbols")
+
+    rows = []
+    result_store = ResultStore(config["results"]) if config["results"] else None
+    for result in run_sweep(symbols, strategies, holding_days=config["holding_days"], workers=config["workers"],
+                            io_workers=config["io_workers"], loader=loader, result_store=result_store,
+                            exit_rules=config["exit_rules"] or None):
+        if result.error is not None:
+            print(f"[WARNING] Error processing {result.symbol}: {result.error}")
+        else:
+            print(f"[INFO] {result.symbol} → CAGR: {result.cagr:.2f}%{' (cached)' if result.cached else ''}")
+        rows.append({"Symbol": result.symbol, **{name: result.metrics.get(name) for name in METRIC_COLUMNS},
+                     "Error": result.error})
+
+    os.makedirs(out, exist_ok=True)
+    csv_path, manifest_path = shard_paths(out, index, count)
+    table = pd.DataFrame(rows, columns=["Symbol", *METRIC_COLUMNS, "Error"]).sort_values("Symbol")
+    # Results first, manifest last (both via rename), so a manifest always means a complete shard
+    table.to_csv(csv_path + ".tmp", index=False)
+    os.replace(csv_path + ".tmp", csv_path)
+    manifest = {"shard": index, "shards": count, "config": config, "config_hash": config_hash(config),
+                "symbols": len(symbols), "screened_out": screened_out, "errors": int(table["Error"].notna().sum()),
+                "elapsed": time.time() - started}
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return table
+
+
+def merge_shards(out="batch_results"):
+    # Checks that every shard of one sweep is present, concatenates their results into <out>/merged.csv and
+    # returns (table, CagrBuckets) rebuilt from the successful rows
+    import pandas as pd
+    from sweep import CagrBuckets
+
+    manifests = []
+    for path in sorted(glob.glob(os.path.join(out, "shard-*-of-*.json"))):
+        with open(path) as f:
+            manifests.append(json.load(f))
+    if not manifests:
+        raise ValueError(f"No shard manifests in {out}")
+    if len({(m["shards"], m["config_hash"]) for m in manifests}) > 1:
+        raise ValueError(f"Shards in {out} come from different sweeps (shard count or settings differ)")
+    count = manifests[0]["shards"]
+    missing = sorted(set(range(count)) - {m["shard"] for m in manifests})
+    if missing:
+        raise ValueError(f"Missing shards {missing} of {count}")
+
+    table = pd.concat([pd.read_csv(shard_paths(out, i, count)[0], float_precision="round_trip") for i in range(count)],
+                      ignore_index=True)
+    table = table.sort_values("Symbol", ignore_index=True)
+    table.to_csv(os.path.join(out, "merged.csv"), index=False)
+    buckets = CagrBuckets()
+    for symbol, cagr, error in zip(table["Symbol"], table["CAGR (%)"], table["Error"]):
+        if pd.isna(error) and not pd.isna(cagr):
+            buckets.add(symbol, cagr)
+    return table, buckets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Non-interactive, shardable batch backtests.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run one shard of a sweep")
+    run.add_argument("--config", help="JSON file with any of: " + ", ".join(DEFAULTS))
+    run.add_argument("--universe", help="CSV file with a 'Symbol' column")
+    run.add_argument("--symbols", nargs="+", help="Explicit symbols instead of a universe CSV")
+    run.add_argument("--strategy", action="append", dest="strategies",
+                     help="Strategy name as in strategies.STRATEGIES (repeat to combine)")
+    run.add_argument("--params", type=json.loads,
+                     help="JSON overrides, e.g. '{\"MACD Strategy\": {\"short_window\": 8}}'")
+    run.add_argument("--holding-days", type=int)
+    run.add_argument("--start")
+    run.add_argument("--end")
+    run.add_argument("--interval")
+    run.add_argument("--exit-rules", type=json.loads, help="JSON, e.g. '{\"stop_loss_pct\": 3}'")
+    run.add_argument("--screen", help="SQL filter over the screener index, e.g. \"bars >= 252\"")
+    run.add_argument("--screener", help="Screener index path")
+    run.add_argument("--results", help="SQLite result store to reuse results from")
+    run.add_argument("--workers", type=int)
+    run.add_argument("--io-workers", type=int)
+    run.add_argument("--shard", default="0/1", help="Run shard i of N (0 <= i < N), e.g. 2/8")
+    run.add_argument("--out", default="batch_results", help="Directory for the shard result files")
+
+    merge = commands.add_parser("merge", help="Combine the shard files of a sweep and rebuild the CAGR buckets")
+    merge.add_argument("out", nargs="?", default="batch_results")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "run":
+            index, count = parse_shard(args.shard)
+            config = load_config(args.config, **{name: getattr(args, name, None) for name in DEFAULTS})
+            table = run_shard(config, index, count, args.out)
+            print(f"[INFO] Wrote {shard_paths(args.out, index, count)[0]} ({len(table)} symbols)")
+        else:
+            table, buckets = merge_shards(args.out)
+            print(f"[INFO] Merged {len(table)} symbols into {os.path.join(args.out, 'merged.csv')}")
+            print("\n[BATCH SUMMARY]")
+            for line in buckets.summary_lines():
+                print(line)
+    except ValueError as e:
+        print(f"[Error] {e}")
+        exit(1)
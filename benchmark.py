@@ -0,0 +1,157 @@
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from backtester import backtest_fixed_holding, backtest_fixed_holding_loop, summarize_results
+from breakout_52w import Breakout52Week
+from exit_rules import backtest_exit_rules
+from ma_crossover import MovingAverageCrossover
+from macd_strategy import MACDStrategy
+from rsi_strategy import RSIStrategy
+from strategy_base import combine_signals
+from volume_spike import VolumeSpikeStrategy
+
+UNIVERSES = {
+    "nifty50": "nifty50.csv",
+    "midcap100": "midcap100.csv",
+    "smallcap100": "smallcap100.csv",
+    "all_nse": "all_nse_equity_symbols.csv",
+}
+
+STRATEGIES = [
+    (Breakout52Week, {}),
+    (MovingAverageCrossover, {"short_window": 50, "long_window": 200}),
+    (RSIStrategy, {}),
+    (VolumeSpikeStrategy, {}),
+    (MACDStrategy, {}),
+]
+
+
+def universe_size(name):
+    return pd.read_csv(UNIVERSES[name], usecols=['Symbol'])['Symbol'].dropna().nunique()
+
+
+def synthetic_ohlcv(n_days=1250, seed=0, start='2020-06-01'):
+    # Deterministic NSE-like daily bars: GBM closes around a few hundred rupees,
+    # intraday ranges of ~2% and lognormal volume with occasional spikes
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=n_days, name='Date')
+    close = rng.uniform(50, 3000) * np.exp(np.cumsum(rng.normal(0.0004, 0.02, n_days)))
+    open_ = close * np.exp(rng.normal(0, 0.006, n_days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n_days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n_days))
+    volume = rng.lognormal(12, 0.5, n_days) * np.where(rng.random(n_days) < 0.03, rng.uniform(2, 6, n_days), 1)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close,
+                         'Volume': volume.round()}, index=index)
+
+
+def random_signals(index, density=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    signal = rng.choice([0, 1, -1], size=len(index), p=[1 - density, density / 2, density / 2])
+    return pd.DataFrame({'signal': signal}, index=index)
+
+
+def time_stage(fn, inputs, memory_samples=5):
+    timings = []
+    for args in inputs:
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+
+    # tracemalloc slows the calls down, so peak memory is measured in a separate pass on a few inputs
+    peak = 0
+    for args in inputs[:memory_samples]:
+        tracemalloc.start()
+        fn(*args)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    timings = np.array(timings)
+    return {
+        "symbols": len(inputs),
+        "total_s": float(timings.sum()),
+        "mean_ms": float(timings.mean() * 1000),
+        "p50_ms": float(np.percentile(timings, 50) * 1000),
+        "p95_ms": float(np.percentile(timings, 95) * 1000),
+        "symbols_per_s": float(len(inputs) / timings.sum()) if timings.sum() > 0 else float('inf'),
+        "peak_mem_kb": peak / 1024,
+    }
+
+
+def benchmark_universe(n_symbols, n_days=1250, density=0.1, holding_days=5, seed=0, reference=False):
+    frames = [synthetic_ohlcv(n_days, seed=seed + i) for i in range(n_symbols)]
+    signals = [random_signals(df.index, density, seed=seed + i) for i, df in enumerate(frames)]
+    results = {}
+
+    for cls, params in STRATEGIES:
+        results[f"signals:{cls.__name__}"] = time_stage(
+            lambda data, cls=cls, params=params: cls(data, **params).generate_signals(), [(df,) for df in frames])
+
+    strategy_signals = [tuple(cls(df, **params).generate_signals() for cls, params in STRATEGIES) for df in frames]
+    results["combine_signals"] = time_stage(combine_signals, strategy_signals)
+    backtest_inputs = [(df, sig, holding_days) for df, sig in zip(frames, signals)]
+    results["backtest_fixed_holding"] = time_stage(backtest_fixed_holding, backtest_inputs)
+    results["backtest_exit_rules"] = time_stage(
+        lambda data, sig, h: backtest_exit_rules(data, sig, h, stop_loss_pct=3, take_profit_pct=5,
+                                                 trailing_stop_pct=2),
+        backtest_inputs)
+    if reference:
+        results["backtest_fixed_holding_loop"] = time_stage(backtest_fixed_holding_loop, backtest_inputs)
+    trades = [backtest_fixed_holding(*args) for args in backtest_inputs]
+    results["summarize_results"] = time_stage(summarize_results, [(t,) for t in trades if not t.empty])
+    return results
+
+
+def compare(current, baseline, threshold=10.0):
+    print(f"\n{'universe':<12} {'stage':<34} {'base ms':>10} {'now ms':>10} {'change':>9}")
+    for universe, stages in current["results"].items():
+        for stage, stats in stages.items():
+            base = baseline.get("results", {}).get(universe, {}).get(stage)
+            if base is None:
+                continue
+            change = (stats["mean_ms"] / base["mean_ms"] - 1) * 100 if base["mean_ms"] > 0 else 0.0
+            flag = "  ⚠️ slower" if change > threshold else ""
+            print(f"{universe:<12} {stage:<34} {base['mean_ms']:>10.3f} {stats['mean_ms']:>10.3f} {change:>8.1f}%{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the backtest hot paths on synthetic data.")
+    parser.add_argument("--universes", nargs="+", default=["nifty50", "midcap100", "smallcap100"],
+                        choices=list(UNIVERSES), help="Universe sizes to benchmark (taken from the symbol CSVs)")
+    parser.add_argument("--symbols", type=int, default=None, help="Override the symbol count for every universe")
+    parser.add_argument("--days", type=int, default=1250, help="Bars of history per symbol")
+    parser.add_argument("--density", type=float, default=0.1, help="Share of bars carrying a backtest signal")
+    parser.add_argument("--holding-days", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reference", action="store_true", help="Also time the original per-signal backtest loop")
+    parser.add_argument("--save", help="Write results to this JSON file (e.g. a committed baseline)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {"days": args.days, "density": args.density, "holding_days": args.holding_days, "seed": args.seed,
+                 "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__},
+        "results": {},
+    }
+    for universe in args.universes:
+        n_symbols = args.symbols or universe_size(universe)
+        print(f"\n[BENCH] {universe}: {n_symbols} symbols × {args.days} bars")
+        stages = benchmark_universe(n_symbols, args.days, args.density, args.holding_days, args.seed,
+                                    reference=args.reference)
+        report["results"][universe] = stages
+        for stage, stats in stages.items():
+            print(f"  {stage:<34} {stats['mean_ms']:8.3f} ms/symbol  p95 {stats['p95_ms']:8.3f} ms  "
+                  f"{stats['symbols_per_s']:9.1f} symbols/s  peak {stats['peak_mem_kb']:9.1f} KB")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[BENCH] Saved results to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
@@ -1,12 +1,41 @@
+from collections import deque
+
+import numpy as np
 import pandas as pd
 from strategy_base import Strategy
 
 class Breakout52Week(Strategy):
-    def generate_signals(self):
-        high_52w = self.data['Close'].rolling(window=252).max()
-        self.signals['signal'] = 0
-        condition = self.data['Close'] > high_52w.shift(1)
-        self.signals.loc[condition, 'signal'] = 1
-
-        print(f"\n📊 52-Week Breakout: Total Signals: {condition.sum()}")
-        return self.signals
+    param_names = ('window',)
+    # Buy when the close clears the highest close of the previous `window` bars
+    rules = ((1, "close > shift(rolling_max(close, window))"),)
+
+    def __init__(self, data: pd.DataFrame, window: int = 252):
+        super().__init__(data)
+        self.window = window
+
+    def lookback(self):
+        # The previous `window` closes
+        return self.window
+
+    @classmethod
+    def generate_panel_signals(cls, panel, window: int = 252):
+        close = panel.frame('Close')
+        high_52w = close.rolling(window=window).max()
+        return (close > high_52w.shift(1)).to_numpy().astype(np.int8)
+
+    def initial_state(self):
+        # Monotonic deque of (bar number, close) holding the running max of the previous `window` closes
+        return {"bars": 0, "highs": deque()}
+
+    def update(self, bar):
+        state = self.state
+        close, bar_no, highs = bar['Close'], state["bars"], state["highs"]
+        while highs and highs[0][0] < bar_no - self.window:
+            highs.popleft()
+        signal = 1 if bar_no >= self.window and close > highs[0][1] else 0
+
+        while highs and highs[-1][1] <= close:
+            highs.pop()
+        highs.append((bar_no, close))
+        state["bars"] = bar_no + 1
+        return signal
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from fetch_data_module import get_store
+
+
+def read_universe(csv_path):
+    return pd.read_csv(csv_path, usecols=['Symbol'])['Symbol'].dropna().unique().tolist()
+
+
+class TokenBucket:
+    # Allows `rate` requests per second on average with bursts of up to `capacity`; thread-safe
+    def __init__(self, rate=2.0, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class BulkLoader:
+    # Fills the local OHLCV store for a whole symbol list with concurrent, batched provider requests.
+    # Requests go through a token bucket, failed requests are retried with exponential backoff and
+    # full jitter, and a JSON checkpoint records finished and failed symbols so an interrupted load
+    # resumes where it stopped.
+    def __init__(self, store=None, batch_size=20, workers=4, rate=2.0, retries=4, backoff=1.0,
+                 checkpoint='bulk_checkpoint.json', sleep=time.sleep):
+        self.store = store or get_store()
+        self.batch_size = batch_size
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.checkpoint = checkpoint
+        self.sleep = sleep
+
+    def _read_checkpoint(self, key):
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as f:
+                state = json.load(f)
+            # A checkpoint from a different date range or interval says nothing about this load
+            if state.get("key") == key:
+                return state
+        return {"key": key, "completed": [], "failed": {}}
+
+    def _save_checkpoint(self, state):
+        if not self.checkpoint:
+            return
+        with open(self.checkpoint + '.tmp', 'w') as f:
+            json.dump(state, f, indent=1)
+        os.replace(self.checkpoint + '.tmp', self.checkpoint)
+
+    def _request(self, symbols, start, end, interval):
+        provider = self.store.provider
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            self.bucket.acquire()
+            try:
+                if len(symbols) > 1 and hasattr(provider, 'download_many'):
+                    return provider.download_many(symbols, start, end, interval=interval)
+                return {symbol: provider.download(symbol, start, end, interval=interval) for symbol in symbols}
+            except Exception as e:
+                last_error = e
+        raise RuntimeError(f"{type(last_error).__name__}: {last_error}")
+
+    def _load_batch(self, symbols, start, end, interval):
+        # Returns {symbol: None | failure record}
+        range_start, range_end = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+        try:
+            frames = self._request(symbols, range_start, range_end, interval)
+        except RuntimeError as e:
+            if len(symbols) == 1:
+                return {symbols[0]: {"error": str(e), "attempts": self.retries + 1}}
+            frames = {}
+
+        outcome = {}
+        for symbol in symbols:
+            frame = frames.get(symbol)
+            try:
+                # The store skips empty frames (Yahoo's answer to throttled or unknown tickers) and returns None
+                stored = frame is not None and self.store.append(symbol, frame, start, end, interval) is not None
+            except Exception as e:
+                # A frame the store cannot write (missing columns, bad types, disk errors) fails only its symbol
+                outcome[symbol] = {"error": f"Storing failed: {type(e).__name__}: {e}", "attempts": 1}
+                continue
+            if stored:
+                outcome[symbol] = None
+            elif len(symbols) > 1:
+                # Missing from a batched answer: retry the symbol on its own before giving up
+                outcome.update(self._load_batch([symbol], start, end, interval))
+            else:
+                outcome[symbol] = {"error": "No data returned", "attempts": self.retries + 1}
+        return outcome
+
+    def load(self, symbols, start='2020-06-01', end='2025-06-01', interval='1d'):
+        start, end = pd.Timestamp(start), self.store.fetch_end(end)
+        state = self._read_checkpoint([str(start), str(end), interval])
+        completed = set(state["completed"])
+        report = {"loaded": [], "cached": [], "failed": {}}
+
+        # Group symbols by the range they are missing so each batch is one provider request. A symbol missing
+        # both ends of its range is in two batches; it is complete only once both have loaded.
+        groups, pending = {}, {}
+        for symbol in dict.fromkeys(symbols):
+            if symbol in completed:
+                report["cached"].append(symbol)
+                continue
+            ranges = self.store.missing_ranges(symbol, start, end, interval) if start < end else []
+            if not ranges:
+                report["cached"].append(symbol)
+            for missing in ranges:
+                groups.setdefault(missing, []).append(symbol)
+            pending[symbol] = len(ranges)
+
+        batches = [(group[i:i + self.batch_size], missing)
+                   for missing, group in groups.items() for i in range(0, len(group), self.batch_size)]
+        failed_now = set()
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(self._load_batch, batch, *missing, interval) for batch, missing in batches]
+            for future in as_completed(futures):
+                for symbol, failure in future.result().items():
+                    pending[symbol] -= 1
+                    if failure is not None:
+                        failed_now.add(symbol)
+                        state["failed"][symbol] = report["failed"][symbol] = failure
+                    elif not pending[symbol] and symbol not in failed_now:
+                        state["failed"].pop(symbol, None)
+                        state["completed"].append(symbol)
+                        report["loaded"].append(symbol)
+                self._save_checkpoint(state)
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-download OHLCV bars for a symbol universe into the local cache.")
+    parser.add_argument("symbols_csv", help="CSV file with a 'Symbol' column (e.g. all_nse_equity_symbols.csv)")
+    parser.add_argument("--start", default="2020-06-01")
+    parser.add_argument("--end", default="2025-06-01")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--batch-size", type=int, default=20, help="Symbols per provider request")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--rate", type=float, default=2.0, help="Max requests per second")
+    parser.add_argument("--retries", type=int, default=4)
+    parser.add_argument("--checkpoint", default="bulk_checkpoint.json")
+    args = parser.parse_args()
+
+    loader = BulkLoader(batch_size=args.batch_size, workers=args.workers, rate=args.rate,
+                        retries=args.retries, checkpoint=args.checkpoint)
+    report = loader.load(read_universe(args.symbols_csv), args.start, args.end, args.interval)
+    print(f"[INFO] Loaded: {len(report['loaded'])}, already cached: {len(report['cached'])}, "
+          f"failed: {len(report['failed'])}")
+    for symbol, failure in report["failed"].items():
+        print(f"[WARNING] {symbol}: {failure['error']} (after {failure['attempts']} attempts)")
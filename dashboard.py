@@ -1,131 +1,141 @@
-from breakout_52w import Breakout52Week
-from ma_crossover import MovingAverageCrossover
-from rsi_strategy import RSIStrategy
-from volume_spike import VolumeSpikeStrategy
-from macd_strategy import MACDStrategy
-from backtester import backtest_fixed_holding, summarize_results
-import yfinance as yf
+from fetch_data_module import fetch_data
+from result_store import ResultStore, config_label
+from strategies import STRATEGIES, STRATEGY_NAMES
+from sweep import CagrBuckets, SweepJob
 import pandas as pd
 import streamlit as st
 
-def fetch_data(symbol='RELIANCE.NS', start='2020-06-01', end='2025-06-01'):
-    df = yf.download(symbol, start=start, end=end, interval='1d', group_by='ticker')
-    if isinstance(df.columns, pd.MultiIndex):
-        df = df.droplevel(0, axis=1)
-    df = df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
-    df.index.name = 'Date'
-    return df
-
-def combine_signals(*signals_list):
-    combined = signals_list[0].copy()
-    combined['signal'] = 0
-    for signals in signals_list:
-        combined['signal'] += signals['signal']
-    combined['signal'] = combined['signal'].clip(lower=-1, upper=1)
-    return combined
+HOLDING_DAYS = 5
+
+UNIVERSE_FILES = {
+    "NIFTY 50": "nifty50.csv",
+    "NIFTY Midcap 100": "midcap100.csv",
+    "NIFTY Smallcap 100": "smallcap100.csv",
+    "All NSE Listed Stocks": "all_nse_equity_symbols.csv",
+}
+
+
+@st.cache_data(show_spinner=False)
+def read_symbols(path):
+    return pd.read_csv(path, usecols=['Symbol'])['Symbol'].dropna().unique().tolist()
+
+
+@st.cache_data(ttl=6 * 3600, max_entries=5000, show_spinner=False)
+def load_symbol(symbol):
+    # Called from the sweep's loader threads; reruns and later jobs reuse the frames
+    return fetch_data(symbol)
+
+
+@st.cache_resource
+def sweep_jobs():
+    # (symbols, config) -> SweepJob, shared by every rerun and session, so changing a widget
+    # reruns the script without touching a running job
+    return {}
+
+
+@st.cache_resource
+def result_store():
+    # Results keyed by (data, strategy, params); a rerun of the same config only computes what changed
+    return ResultStore("results.db")
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "–"
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def show_job(job_key):
+    job = sweep_jobs()[job_key]
+    progress = job.progress()
+    done, total = progress["done"], progress["total"]
+    state = "running" if job.running else "cancelled" if job.cancelled else "finished"
+    st.caption(f"{job_key[1]} on {total} symbols ({state})")
+    st.progress(done / total if total else 1.0,
+                text=f"{done}/{total} symbols · {progress['failed']} failed · "
+                     f"{progress['throughput']:.1f} symbols/s · elapsed {format_seconds(progress['elapsed'])} · "
+                     f"ETA {format_seconds(progress['eta'])}")
+    if job.error is not None:
+        st.error(f"Sweep stopped: {job.error}")
+
+    results = job.snapshot()
+    buckets = CagrBuckets()
+    rows = []
+    for result in results:
+        if result.error is None:
+            buckets.add(result.symbol, result.cagr)
+            rows.append({"Symbol": result.symbol, **result.metrics, "Cached": result.cached})
+    if rows:
+        # Click a column header to sort
+        table = pd.DataFrame(rows).sort_values("CAGR (%)", ascending=False)
+        st.dataframe(table, hide_index=True, use_container_width=True)
+
+    failures = [(result.symbol, result.error) for result in results if result.error is not None]
+    if failures:
+        with st.expander(f"⚠️ {len(failures)} symbols failed"):
+            st.dataframe(pd.DataFrame(failures, columns=["Symbol", "Error"]), hide_index=True)
+
+    st.subheader("📊 Summary:")
+    for line in buckets.summary_lines():
+        st.write(line)
+
+    if job.running:
+        if st.button("Cancel Run"):
+            job.cancel()
+    elif st.session_state.get("polling"):
+        # Stop polling once the job is done
+        st.session_state["polling"] = False
+        st.rerun()
+
 
 def main():
     st.title("📈 Strategy Backtester Dashboard")
 
     dataset_choice = st.selectbox("Choose dataset to run the strategy on:", (
-        "NIFTY 50", "NIFTY Midcap 100", "NIFTY Smallcap 100", "All NSE Listed Stocks", "Individual Stock", "From Custom CSV File"
+        *UNIVERSE_FILES, "Individual Stock", "From Custom CSV File"
     ))
 
-    if dataset_choice == "NIFTY 50":
-        df = pd.read_csv("nifty50.csv", usecols=['Symbol'])
-    elif dataset_choice == "NIFTY Midcap 100":
-        df = pd.read_csv("midcap100.csv", usecols=['Symbol'])
-    elif dataset_choice == "NIFTY Smallcap 100":
-        df = pd.read_csv("smallcap100.csv", usecols=['Symbol'])
-    elif dataset_choice == "All NSE Listed Stocks":
-        df = pd.read_csv("all_nse_equity_symbols.csv", usecols=['Symbol'])
+    if dataset_choice in UNIVERSE_FILES:
+        symbols = read_symbols(UNIVERSE_FILES[dataset_choice])
     elif dataset_choice == "Individual Stock":
         symbol = st.text_input("Enter stock symbol (e.g., RELIANCE.NS):").upper()
-        df = pd.DataFrame({'Symbol': [symbol]})
+        symbols = [symbol] if symbol else []
     elif dataset_choice == "From Custom CSV File":
         uploaded_file = st.file_uploader("Upload CSV file with 'Symbol' column")
         if uploaded_file is not None:
-            df = pd.read_csv(uploaded_file, usecols=['Symbol'])
+            symbols = pd.read_csv(uploaded_file, usecols=['Symbol'])['Symbol'].dropna().unique().tolist()
         else:
-            st.stop()
+            symbols = []
 
-    symbols = df['Symbol'].dropna().unique().tolist()
-
-    strategy_choice = st.selectbox("Select strategy:", (
-        "52-Week High Breakout", "Moving Average Crossover", "RSI Strategy", "Volume Spike Strategy", "MACD Strategy", "Combine Multiple Strategies"
-    ))
+    strategy_choice = st.selectbox("Select strategy:", (*STRATEGY_NAMES, "Combine Multiple Strategies"))
 
     if strategy_choice == "Combine Multiple Strategies":
-        multi_choices = st.multiselect("Choose strategies to combine:", [
-            "52-Week High Breakout", "Moving Average Crossover", "RSI Strategy", "Volume Spike Strategy", "MACD Strategy"
-        ])
-
-    if st.button("Run Backtest"):
-        positive_cagr = above_12_cagr = above_16_cagr = above_20_cagr = negative_cagr = 0
-        top_12_names = []
-        top_16_names = []
-        top_20_names = []
-
-        for symbol in symbols:
-            with st.spinner(f"📥 Fetching data for {symbol}..."):
-                try:
-                    data = fetch_data(symbol)
-                    if strategy_choice == "52-Week High Breakout":
-                        signals = Breakout52Week(data).generate_signals()
-                    elif strategy_choice == "Moving Average Crossover":
-                        signals = MovingAverageCrossover(data, 50, 200).generate_signals()
-                    elif strategy_choice == "RSI Strategy":
-                        signals = RSIStrategy(data).generate_signals()
-                    elif strategy_choice == "Volume Spike Strategy":
-                        signals = VolumeSpikeStrategy(data).generate_signals()
-                    elif strategy_choice == "MACD Strategy":
-                        signals = MACDStrategy(data).generate_signals()
-                    elif strategy_choice == "Combine Multiple Strategies":
-                        signals_list = []
-                        for strat in multi_choices:
-                            if strat == "52-Week High Breakout":
-                                signals_list.append(Breakout52Week(data).generate_signals())
-                            elif strat == "Moving Average Crossover":
-                                signals_list.append(MovingAverageCrossover(data, 50, 200).generate_signals())
-                            elif strat == "RSI Strategy":
-                                signals_list.append(RSIStrategy(data).generate_signals())
-                            elif strat == "Volume Spike Strategy":
-                                signals_list.append(VolumeSpikeStrategy(data).generate_signals())
-                            elif strat == "MACD Strategy":
-                                signals_list.append(MACDStrategy(data).generate_signals())
-                        signals = combine_signals(*signals_list)
-                    else:
-                        st.error("Invalid strategy choice.")
-                        continue
-
-                    results = backtest_fixed_holding(data, signals, holding_days=5)
-                    cagr = summarize_results(results)
-
-                    if cagr > 0:
-                        positive_cagr += 1
-                        if cagr > 12:
-                            above_12_cagr += 1
-                            top_12_names.append(symbol)
-                        if cagr > 16:
-                            above_16_cagr += 1
-                            top_16_names.append(symbol)
-                        if cagr > 20:
-                            above_20_cagr += 1
-                            top_20_names.append(symbol)
-                        st.success(f"{symbol} → CAGR: {cagr:.2f}%")
-                    else:
-                        negative_cagr += 1
-                        st.error(f"{symbol} → CAGR: {cagr:.2f}%")
-
-                except Exception as e:
-                    st.warning(f"⚠️ {symbol} failed: {e}")
-
-        st.subheader("📊 Summary:")
-        st.write(f"Positive CAGR: {positive_cagr}")
-        st.write(f"Negative CAGR: {negative_cagr}")
-        st.write(f"CAGR > 12%: {above_12_cagr} → {top_12_names}")
-        st.write(f"CAGR > 16%: {above_16_cagr} → {top_16_names}")
-        st.write(f"CAGR > 20%: {above_20_cagr} → {top_20_names}")
+        multi_choices = st.multiselect("Choose strategies to combine:", STRATEGY_NAMES)
+        strategies = [STRATEGIES[name] for name in multi_choices]
+    else:
+        strategies = [STRATEGIES[strategy_choice]]
+
+    workers = st.number_input("Worker processes (0 = run inline):", min_value=0, value=4, step=1)
+
+    jobs = sweep_jobs()
+    if st.button("Run Backtest", disabled=not symbols or not strategies):
+        job_key = (tuple(symbols), config_label(strategies, HOLDING_DAYS))
+        # A running job for the same selection is picked up again instead of being restarted
+        if job_key not in jobs or not jobs[job_key].running:
+            jobs[job_key] = SweepJob(symbols, strategies, holding_days=HOLDING_DAYS, workers=int(workers),
+                                     loader=load_symbol, result_store=result_store()).start()
+        st.session_state["job_key"] = job_key
+
+    job_key = st.session_state.get("job_key")
+    if job_key not in jobs:
+        return
+    st.divider()
+    if jobs[job_key].running:
+        st.session_state["polling"] = True
+    # While the job runs only this fragment reruns, once a second
+    st.fragment(show_job, run_every=1.0 if st.session_state.get("polling") else None)(job_key)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+import pandas as pd
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+ROW_GROUP_SIZE = 100_000
+
+
+def clean_ohlcv(df: pd.DataFrame):
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.droplevel(0, axis=1)
+    if df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'), dtype=float)
+    df = df[OHLCV_COLUMNS].dropna()
+    if getattr(df.index, 'tz', None) is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = 'Date'
+    return df
+
+
+# Providers implement download(symbol, start, end, interval) and may implement
+# download_many(symbols, start, end, interval) -> {symbol: frame} to fetch a batch in one request.
+class YahooProvider:
+    def download(self, symbol, start, end, interval='1d'):
+        import yfinance as yf
+        return yf.download(symbol, start=start, end=end, interval=interval, group_by='ticker', progress=False)
+
+    def download_many(self, symbols, start, end, interval='1d'):
+        import yfinance as yf
+        df = yf.download(list(symbols), start=start, end=end, interval=interval, group_by='ticker',
+                         progress=False, threads=False)
+        if not isinstance(df.columns, pd.MultiIndex):
+            return {symbols[0]: df}
+        tickers = set(df.columns.get_level_values(0))
+        return {symbol: df[symbol] for symbol in symbols if symbol in tickers}
+
+
+class DataFrameProvider:
+    # Serves bars from in-memory frames; a local stand-in for Yahoo in tests and benchmarks.
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def download(self, symbol, start, end, interval='1d'):
+        self.calls.append((symbol, start, end, interval))
+        df = self.frames[symbol]
+        return df.loc[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+
+    def download_many(self, symbols, start, end, interval='1d'):
+        return {symbol: self.download(symbol, start, end, interval) for symbol in symbols if symbol in self.frames}
+
+
+# Per-symbol Parquet cache: <root>/<interval>/<symbol>.parquet, plus a JSON file recording the
+# [start, end) range already requested from the provider so only the missing ends get downloaded.
+class OHLCVStore:
+    def __init__(self, root='data_cache', provider=None):
+        self.root = root
+        self.provider = provider or YahooProvider()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, symbol, interval='1d'):
+        # Serialises read-merge-write of one symbol's file and coverage between threads (e.g. a bulk load
+        # fetching a symbol's head and tail ranges in two concurrent batches); re-entrant for refresh -> append
+        with self._locks_guard:
+            return self._locks.setdefault((interval, symbol), threading.RLock())
+
+    def _path(self, symbol, interval, ext):
+        return os.path.join(self.root, interval, f"{symbol}.{ext}")
+
+    def coverage(self, symbol, interval='1d'):
+        path = self._path(symbol, interval, 'json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            meta = json.load(f)
+        return pd.Timestamp(meta['start']), pd.Timestamp(meta['end'])
+
+    def read(self, symbol, interval='1d'):
+        path = self._path(symbol, interval, 'parquet')
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def write(self, symbol, df, start, end, interval='1d'):
+        os.makedirs(os.path.join(self.root, interval), exist_ok=True)
+        path = self._path(symbol, interval, 'parquet')
+        # Write to a uniquely named temp file and rename so concurrent readers never see a partial file and
+        # concurrent writers never share a temp file. Bounded row groups let iter_chunks() stream long
+        # intraday histories.
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        df.to_parquet(tmp, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp, path)
+        self.write_coverage(symbol, start, end, interval)
+
+    def write_coverage(self, symbol, start, end, interval='1d'):
+        meta_path = self._path(symbol, interval, 'json')
+        tmp = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'start': str(start), 'end': str(end)}, f)
+        os.replace(tmp, meta_path)
+
+    def merge(self, symbol, new, interval='1d'):
+        # Merges sorted, unique new bars into the cached file (new bars win on equal timestamps) by streaming it
+        # row group by row group through a ParquetWriter, so memory is bounded by one row group plus the new
+        # bars rather than by the history length
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self._path(symbol, interval, 'parquet')
+        parquet = pq.ParquetFile(path)
+        schema = parquet.schema_arrow
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        position = 0
+        with pq.ParquetWriter(tmp, schema) as writer:
+            def write_rows(df):
+                if len(df):
+                    writer.write_table(pa.Table.from_pandas(df, schema=schema), row_group_size=ROW_GROUP_SIZE)
+
+            for batch in parquet.iter_batches(batch_size=ROW_GROUP_SIZE):
+                df = pa.Table.from_batches([batch], schema=schema).to_pandas()
+                df = df[~df.index.isin(new.index)]
+                if df.empty:
+                    continue
+                # New bars up to this batch's last bar go in with it; the file is sorted, so later batches
+                # (and the remaining new bars) all come after
+                upto = new.index.searchsorted(df.index[-1], side='right')
+                write_rows(pd.concat([df, new.iloc[position:upto]]).sort_index())
+                position = upto
+            write_rows(new.iloc[position:])
+        os.replace(tmp, path)
+
+    def missing_ranges(self, symbol, start, end, interval='1d'):
+        covered = self.coverage(symbol, interval)
+        if covered is None:
+            return [(start, end)]
+        ranges = []
+        if start < covered[0]:
+            ranges.append((start, covered[0]))
+        if end > covered[1]:
+            ranges.append((covered[1], end))
+        return ranges
+
+    def append(self, symbol, fetched, start, end, interval='1d'):
+        # Merge bars downloaded for [start, end) into the cache and extend the recorded coverage; returns the
+        # number of bars downloaded. Yahoo answers errors and throttling with empty frames, so an empty download
+        # changes nothing (returns None) and the range is requested again next time.
+        fetched = clean_ohlcv(fetched)
+        if fetched.empty:
+            return None
+        fetched = fetched[~fetched.index.duplicated(keep='last')].sort_index()
+        with self.lock(symbol, interval):
+            covered = self.coverage(symbol, interval)
+            new_start = start if covered is None else min(start, covered[0])
+            new_end = end if covered is None else max(end, covered[1])
+            if os.path.exists(self._path(symbol, interval, 'parquet')):
+                self.merge(symbol, fetched, interval)
+                self.write_coverage(symbol, new_start, new_end, interval)
+            else:
+                self.write(symbol, fetched, new_start, new_end, interval)
+            return len(fetched)
+
+    @staticmethod
+    def fetch_end(end):
+        # Never mark today's (possibly incomplete) bar as covered
+        return min(pd.Timestamp(end), pd.Timestamp.today().normalize())
+
+    def refresh(self, symbol, start, end, interval='1d'):
+        # Downloads whatever of [start, end) is not cached yet without loading the cached file; returns the
+        # number of bars downloaded
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        fetch_end = self.fetch_end(end)
+        downloaded = 0
+        with self.lock(symbol, interval):
+            ranges = self.missing_ranges(symbol, start, fetch_end, interval) if start < fetch_end else []
+            for range_start, range_end in ranges:
+                fetched = self.provider.download(symbol, range_start.strftime('%Y-%m-%d'),
+                                                 range_end.strftime('%Y-%m-%d'), interval=interval)
+                downloaded += self.append(symbol, fetched, range_start, range_end, interval) or 0
+        return downloaded
+
+    def stamp(self, symbol, start, end, interval='1d'):
+        # Cheap version of what load() would return, from the coverage file and the Parquet footer and file
+        # stats, without reading any bars; None when load() would download first (or nothing is cached)
+        import pyarrow.parquet as pq
+
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        fetch_end = self.fetch_end(end)
+        path = self._path(symbol, interval, 'parquet')
+        with self.lock(symbol, interval):
+            covered = self.coverage(symbol, interval)
+            if covered is None or not os.path.exists(path):
+                return None
+            if start < fetch_end and self.missing_ranges(symbol, start, fetch_end, interval):
+                return None
+            stat = os.stat(path)
+            rows = pq.read_metadata(path).num_rows
+        return hashlib.sha1(repr((symbol, interval, str(start), str(end), str(covered[0]), str(covered[1]), rows,
+                                  stat.st_size, stat.st_mtime_ns)).encode()).hexdigest()
+
+    def load(self, symbol, start, end, interval='1d'):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        self.refresh(symbol, start, end, interval)
+        df = self.read(symbol, interval)
+        if df is None:
+            return clean_ohlcv(pd.DataFrame())
+        return df.loc[(df.index >= start) & (df.index < end)]
+
+    def iter_chunks(self, symbol, start=None, end=None, interval='1d', chunk_rows=ROW_GROUP_SIZE):
+        # Streams the cached bars in [start, end) as frames of at most chunk_rows rows, so memory is
+        # bounded by the chunk (and one row group) rather than by the history length
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self._path(symbol, interval, 'parquet')
+        if not os.path.exists(path):
+            return
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        parquet = pq.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=chunk_rows):
+            df = pa.Table.from_batches([batch], schema=parquet.schema_arrow).to_pandas()
+            if start is not None:
+                df = df.loc[df.index >= start]
+            if end is not None:
+                if len(df) and df.index[0] >= end:
+                    return
+                df = df.loc[df.index < end]
+            if len(df):
+                yield df
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from backtester import compound_trades, trades_frame
+from indicators import atr
+
+EXIT_REASONS = ("time", "stop_loss", "take_profit", "trailing_stop", "atr_stop")
+TIME, STOP_LOSS, TAKE_PROFIT, TRAILING_STOP, ATR_STOP = range(len(EXIT_REASONS))
+
+
+def candidate_exits(open_, high, low, close, entries, sides, holding_days, stop_loss=np.nan, take_profit=np.nan,
+                    trailing_stop=np.nan, atr_distance=None):
+    # Exit bar, fill price and reason for every candidate entry at once. A trade's path only depends on
+    # its entry, not on capital, so each candidate's holding window is one row of a (candidates x
+    # holding_days) matrix and only the compounding walk afterwards is sequential.
+    # Rates are fractions (NaN disables a rule); atr_distance is the ATR stop distance per candidate.
+    # Entries fill at the signal bar's close. On every later bar the stop (the tightest of stop-loss,
+    # ATR stop and the trailing stop off the best price of the previous bars) is checked before the
+    # target; a bar that gaps through a level fills at the open. Unstopped trades exit at the close
+    # `holding_days` bars after entry.
+    m = len(entries)
+    bars = entries[:, None] + np.arange(1, holding_days + 1)
+    side = sides[:, None].astype(np.float64)
+    price = close[entries][:, None]
+    # Prices times side, so "adverse" means lower for longs and shorts alike
+    signed_low = np.where(side == 1, low[bars], -high[bars])
+    signed_high = np.where(side == 1, high[bars], -low[bars])
+    signed_open = side * open_[bars]
+
+    # Fixed stop: tighter of the percentage and ATR stops
+    distance = np.full(m, np.inf)
+    stop_reason = np.full(m, TIME, dtype=np.int8)
+    if not np.isnan(stop_loss):
+        distance = close[entries] * stop_loss
+        stop_reason[:] = STOP_LOSS
+    if atr_distance is not None:
+        tighter = atr_distance < distance  # NaN ATR (warm-up bars) never wins
+        distance = np.where(tighter, atr_distance, distance)
+        stop_reason[tighter] = ATR_STOP
+    signed_level = np.broadcast_to(side * price - distance[:, None], bars.shape)
+    level_reason = np.broadcast_to(stop_reason[:, None], bars.shape)
+
+    if not np.isnan(trailing_stop):
+        # Best signed price before each bar (the entry close, then the running extreme)
+        best = np.maximum.accumulate(np.concatenate([side * price, signed_high[:, :-1]], axis=1), axis=1)
+        signed_trail = best - np.abs(best) * trailing_stop
+        trailing = signed_trail > signed_level
+        signed_level = np.where(trailing, signed_trail, signed_level)
+        level_reason = np.where(trailing, TRAILING_STOP, level_reason)
+
+    stop_hit = signed_low <= signed_level
+    signed_target = side * price * (1 + side * take_profit)
+    target_hit = signed_high >= signed_target  # always False when take_profit is NaN
+
+    hit = stop_hit | target_hit
+    hit_any = hit.any(axis=1)
+    first = np.where(hit_any, hit.argmax(axis=1), holding_days - 1)
+    rows = np.arange(m)
+    stopped = hit_any & stop_hit[rows, first]
+    exits = entries + 1 + first
+
+    fill = close[exits]
+    fill = np.where(stopped, side[:, 0] * np.minimum(signed_open[rows, first], signed_level[rows, first]), fill)
+    fill = np.where(hit_any & ~stopped,
+                    side[:, 0] * np.maximum(signed_open[rows, first], signed_target[:, 0]), fill)
+    reason = np.where(stopped, level_reason[rows, first], np.where(hit_any, TAKE_PROFIT, TIME)).astype(np.int8)
+    return exits, fill, reason
+
+
+def _fraction(percent):
+    return np.nan if percent is None else percent / 100.0
+
+
+def exit_rule_trades(open_, high, low, close, signal, holding_days=5, stop_loss_pct=None, take_profit_pct=None,
+                     trailing_stop_pct=None, atr=None, atr_stop=None, initial_capital=100000):
+    # Path-dependent counterpart of fixed_holding_trades: same inputs plus Open/High/Low (and an ATR
+    # array for atr_stop, a multiple of the entry bar's ATR), same output dict plus "exit_reason"
+    # (codes into EXIT_REASONS). holding_days is the max-holding fallback, and with no rule set the
+    # trades are identical to fixed_holding_trades.
+    if atr_stop is not None and atr is None:
+        raise ValueError("atr_stop needs an ATR array.")
+    open_, high, low, close = (np.asarray(values, dtype=np.float64) for values in (open_, high, low, close))
+    signal = np.asarray(signal)
+    n = len(close)
+
+    entries = np.flatnonzero((signal == 1) | (signal == -1))
+    # Only entries whose max-holding exit exists are candidates, as in fixed_holding_trades
+    entries = entries[:np.searchsorted(entries + holding_days, n)]
+    sides = signal[entries].astype(np.int8)
+    atr_distance = None if atr_stop is None else np.asarray(atr, dtype=np.float64)[entries] * atr_stop
+
+    exits, exit_prices, reasons = candidate_exits(open_, high, low, close, entries, sides, holding_days,
+                                                  _fraction(stop_loss_pct), _fraction(take_profit_pct),
+                                                  _fraction(trailing_stop_pct), atr_distance)
+    return compound_trades(entries, exits, sides, close[entries], exit_prices, initial_capital,
+                           extra={"exit_reason": reasons})
+
+
+def backtest_exit_rules(data, signals, holding_days=5, stop_loss_pct=None, take_profit_pct=None,
+                        trailing_stop_pct=None, atr_stop=None, atr_period=14, initial_capital=100000):
+    # DataFrame wrapper like backtest_fixed_holding, with an extra "Exit Reason" column
+    signals = signals.loc[data.index]
+    stop_atr = None
+    if atr_stop is not None:
+        stop_atr = atr(data['High'], data['Low'], data['Close'], atr_period).to_numpy()
+    trades = exit_rule_trades(data['Open'].to_numpy(), data['High'].to_numpy(), data['Low'].to_numpy(),
+                              data['Close'].to_numpy(), signals['signal'].to_numpy(), holding_days,
+                              stop_loss_pct, take_profit_pct, trailing_stop_pct, stop_atr, atr_stop, initial_capital)
+    if len(trades["pnl"]) == 0:
+        return pd.DataFrame()
+    return trades_frame(trades, data.index,
+                        extra={"Exit Reason": np.asarray(EXIT_REASONS, dtype=object)[trades["exit_reason"]]})
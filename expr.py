@@ -0,0 +1,238 @@
+import ast
+import inspect
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from indicators import atr, rsi
+
+# Strategy expression language. A strategy declares rules = ((signal value, expression), ...); an expression
+# is a Python-syntax formula over the bar columns and the strategy's parameters, e.g.
+#   cross_above(ema(close, 12) - ema(close, 26), ema(ema(close, 12) - ema(close, 26), 9))
+# Rules are applied in order, so a later rule wins where several hold. Expressions are parsed with ast against
+# the whitelist below (nothing is ever eval'd) into one hash-consed DAG per run: identical subexpressions,
+# within a strategy or across all strategies compiled together, become a single node computed once.
+
+COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+
+def _shift(x, periods):
+    out = np.full(len(x), np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+
+# Window functions use the same pandas routines as indicators.py so signals match bit for bit.
+# name -> (number of array arguments, (constant parameter, default or None if required), function)
+FUNCTIONS = {
+    "ema": (1, (("span", None),), lambda x, span: pd.Series(x).ewm(span=span, adjust=False).mean().to_numpy()),
+    "sma": (1, (("window", None),), lambda x, window: pd.Series(x).rolling(window=window).mean().to_numpy()),
+    "rolling_max": (1, (("window", None),), lambda x, window: pd.Series(x).rolling(window=window).max().to_numpy()),
+    "rolling_min": (1, (("window", None),), lambda x, window: pd.Series(x).rolling(window=window).min().to_numpy()),
+    "shift": (1, (("periods", 1),), _shift),
+    "rsi": (1, (("period", 14),), lambda x, period: rsi(pd.Series(x), period).to_numpy()),
+    "atr": (3, (("period", 14),),
+            lambda high, low, close, period: atr(pd.Series(high), pd.Series(low), pd.Series(close), period).to_numpy()),
+    "abs": (1, (), np.abs),
+}
+# Rewritten into primitive nodes so their shifted inputs are shared with the rest of the graph
+MACROS = ("cross_above", "cross_below")
+
+BINARY_OPS = {ast.Add: "add", ast.Sub: "sub", ast.Mult: "mul", ast.Div: "div"}
+COMPARE_OPS = {ast.Gt: "gt", ast.Lt: "lt", ast.GtE: "ge", ast.LtE: "le", ast.Eq: "eq", ast.NotEq: "ne"}
+OPS = {
+    "add": np.add, "sub": np.subtract, "mul": np.multiply, "div": np.true_divide, "neg": np.negative,
+    "gt": np.greater, "lt": np.less, "ge": np.greater_equal, "le": np.less_equal, "eq": np.equal,
+    "ne": np.not_equal, "and": np.logical_and, "or": np.logical_or, "not": np.logical_not,
+}
+
+
+class Graph:
+    def __init__(self):
+        self.nodes = []  # (op, input node ids, constant params); inputs always precede a node
+        self.ids = {}
+
+    def add(self, op, inputs=(), params=()):
+        # Hash-consing: the key includes constant types so rolling(20) and rolling(20.0) stay distinct
+        key = (op, tuple(inputs), tuple((type(p), p) for p in params))
+        node = self.ids.get(key)
+        if node is None:
+            node = self.ids[key] = len(self.nodes)
+            self.nodes.append((op, tuple(inputs), tuple(params)))
+        return node
+
+    def parse(self, source, params=None):
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression {source!r}: {e.msg}") from None
+        return self._node(tree.body, params or {}, source)
+
+    def _constant(self, node, params, source):
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in params:
+            return params[node.id]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -self._constant(node.operand, params, source)
+        raise ValueError(f"Expected a number or parameter in {source!r}, got {ast.unparse(node)!r}")
+
+    def _shifted(self, node):
+        # Shifting a constant leaves it unchanged
+        return node if self.nodes[node][0] == "const" else self.add("shift", (node,), (1,))
+
+    def _node(self, node, params, source):
+        if isinstance(node, ast.Constant):
+            return self.add("const", (), (self._constant(node, params, source),))
+        if isinstance(node, ast.Name):
+            if node.id in COLUMNS:
+                return self.add("column", (), (COLUMNS[node.id],))
+            if node.id in params:
+                return self.add("const", (), (params[node.id],))
+            raise ValueError(f"Unknown name {node.id!r} in {source!r}")
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.Not)):
+            operand = self._node(node.operand, params, source)
+            if isinstance(node.op, ast.Not):
+                return self.add("not", (operand,))
+            if self.nodes[operand][0] == "const":
+                return self.add("const", (), (-self.nodes[operand][2][0],))
+            return self.add("neg", (operand,))
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+            return self.add(BINARY_OPS[type(node.op)], (self._node(node.left, params, source),
+                                                        self._node(node.right, params, source)))
+        if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in COMPARE_OPS:
+            return self.add(COMPARE_OPS[type(node.ops[0])], (self._node(node.left, params, source),
+                                                             self._node(node.comparators[0], params, source)))
+        if isinstance(node, ast.BoolOp):
+            op = "and" if isinstance(node.op, ast.And) else "or"
+            result = self._node(node.values[0], params, source)
+            for value in node.values[1:]:
+                result = self.add(op, (result, self._node(value, params, source)))
+            return result
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            return self._call(node.func.id, node.args, params, source)
+        raise ValueError(f"Unsupported syntax {ast.unparse(node)!r} in {source!r}")
+
+    def _call(self, name, args, params, source):
+        if name in MACROS:
+            if len(args) != 2:
+                raise ValueError(f"{name}() takes 2 arguments in {source!r}")
+            a, b = (self._node(arg, params, source) for arg in args)
+            # cross_above(a, b): a > b now and a <= b on the previous bar (cross_below mirrors it)
+            now, before = ("gt", "le") if name == "cross_above" else ("lt", "ge")
+            return self.add("and", (self.add(now, (a, b)), self.add(before, (self._shifted(a), self._shifted(b)))))
+        if name not in FUNCTIONS:
+            raise ValueError(f"Unknown function {name!r} in {source!r}")
+        arrays, constants, _ = FUNCTIONS[name]
+        if not arrays <= len(args) <= arrays + len(constants):
+            raise ValueError(f"Wrong number of arguments to {name}() in {source!r}")
+        values = [self._constant(arg, params, source) for arg in args[arrays:]]
+        for constant, default in constants[len(values):]:
+            if default is None:
+                raise ValueError(f"{name}() needs {constant!r} in {source!r}")
+            values.append(default)
+        return self.add(name, [self._node(arg, params, source) for arg in args[:arrays]], values)
+
+
+class Program:
+    # Evaluates the requested output nodes of a graph over one history. Only nodes the outputs depend on are
+    # computed (columns included), in topological order, each over whole arrays; an intermediate is dropped
+    # as soon as its last consumer has run, so peak memory is the widest cut of the DAG, not its size.
+    def __init__(self, graph, outputs):
+        self.graph = graph
+        self.outputs = list(outputs)
+        needed, stack = set(), list(self.outputs)
+        while stack:
+            node = stack.pop()
+            if node not in needed:
+                needed.add(node)
+                stack.extend(graph.nodes[node][1])
+        self.order = sorted(needed)
+        self.uses = dict.fromkeys(self.order, 0)
+        for node in self.order:
+            for child in graph.nodes[node][1]:
+                self.uses[child] += 1
+        for node in self.outputs:
+            self.uses[node] += 1
+        self.peak_live = 0
+
+    def run(self, data):
+        values, remaining = {}, dict(self.uses)
+        with np.errstate(all="ignore"):
+            for node in self.order:
+                op, inputs, params = self.graph.nodes[node]
+                if op == "column":
+                    value = data[params[0]].to_numpy(dtype=np.float64)
+                elif op == "const":
+                    value = params[0]
+                elif op in OPS:
+                    value = OPS[op](*(values[child] for child in inputs))
+                else:
+                    value = FUNCTIONS[op][2](*(values[child] for child in inputs), *params)
+                values[node] = value
+                self.peak_live = max(self.peak_live, len(values))
+                for child in inputs:
+                    remaining[child] -= 1
+                    if not remaining[child]:
+                        del values[child]
+        return [values[node] for node in self.outputs]
+
+
+def strategy_params(cls, params):
+    # Constructor defaults overlaid with the given parameters
+    signature = inspect.signature(cls.__init__)
+    full = {name: p.default for name, p in signature.parameters.items()
+            if p.default is not inspect.Parameter.empty}
+    full.update(params)
+    return full
+
+
+@lru_cache(maxsize=256)
+def _compile(strategies):
+    graph, outputs, rules = Graph(), [], []
+    for cls, params in strategies:
+        strategy_rules = []
+        for value, source in cls.rules:
+            outputs.append(graph.parse(source, strategy_params(cls, dict(params))))
+            strategy_rules.append((value, len(outputs) - 1))
+        rules.append(strategy_rules)
+    return Program(graph, outputs), rules
+
+
+def compile_strategies(strategies):
+    # strategies: [(expression strategy class, params)] -> (Program, per strategy [(signal value, output index)]).
+    # Compiled once per configuration and reused for every symbol of a sweep.
+    return _compile(tuple((cls, tuple(sorted(params.items()))) for cls, params in strategies))
+
+
+def evaluate_strategies(data, strategies):
+    # One signal array (int64, like Strategy.signals) per strategy, from a single pass over the shared graph
+    if not strategies:
+        return []
+    program, rules = compile_strategies(strategies)
+    outputs = program.run(data)
+    signals = []
+    for strategy_rules in rules:
+        signal = np.zeros(len(data), dtype=np.int64)
+        for value, index in strategy_rules:
+            signal[np.broadcast_to(np.asarray(outputs[index], dtype=bool), signal.shape)] = value
+        signals.append(signal)
+    return signals
+
+
+if __name__ == "__main__":
+    import argparse
+    from fetch_data_module import fetch_data
+    from strategies import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Show the shared compute graph of strategies and their signals.")
+    parser.add_argument("symbol")
+    parser.add_argument("strategies", nargs="*", help="Registered strategy names (default: all)")
+    args = parser.parse_args()
+    selected = [STRATEGIES[name] for name in args.strategies or STRATEGIES]
+    program, _ = compile_strategies(selected)
+    signals = evaluate_strategies(fetch_data(args.symbol), selected)
+    print(f"{len(program.order)} nodes, at most {program.peak_live} arrays alive")
+    for name, signal in zip(args.strategies or STRATEGIES, signals):
+        print(f"{name}: {int((signal == 1).sum())} buys, {int((signal == -1).sum())} sells")
@@ -1,9 +1,35 @@
-import yfinance as yf
+import os
+from data_store import OHLCVStore
 
-def fetch_data(symbol='RELIANCE.NS', start='2022-06-01', end='2024-06-01'):
-    df = yf.download(symbol, start=start, end=end, interval='1d')
-    df = df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
-    return df
+_store = None
 
-data = fetch_data()
-print(data.tail())
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = OHLCVStore(os.environ.get('NIFTY_DATA_CACHE', 'data_cache'))
+    return _store
+
+
+def fetch_data(symbol='RELIANCE.NS', start='2020-06-01', end='2025-06-01', interval='1d', store=None):
+    store = store or get_store()
+    return store.load(symbol, start, end, interval=interval)
+
+
+def data_stamp(symbol='RELIANCE.NS', start='2020-06-01', end='2025-06-01', interval='1d', store=None):
+    # Cheap stand-in for hashing fetch_data()'s bars (see OHLCVStore.stamp); None if they must be loaded
+    store = store or get_store()
+    return store.stamp(symbol, start, end, interval=interval)
+
+
+def fetch_chunks(symbol='RELIANCE.NS', start='2020-06-01', end='2025-06-01', interval='1m',
+                 chunk_rows=100_000, store=None):
+    # Out-of-core counterpart of fetch_data for long intraday histories: yields frames of chunk_rows bars
+    store = store or get_store()
+    store.refresh(symbol, start, end, interval=interval)
+    return store.iter_chunks(symbol, start, end, interval=interval, chunk_rows=chunk_rows)
+
+
+if __name__ == "__main__":
+    data = fetch_data(start='2022-06-01', end='2024-06-01')
+    print(data.tail())
@@ -0,0 +1,47 @@
+import math
+from itertools import islice
+
+import pandas as pd
+
+
+def rsi(series: pd.Series, period: int = 14):
+    delta = series.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+
+    avg_gain = gain.rolling(period).mean()
+    avg_loss = loss.rolling(period).mean()
+
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14):
+    # Average true range, with the same simple rolling mean as rsi()
+    previous_close = close.shift(1)
+    true_range = pd.concat([high - low, (high - previous_close).abs(), (low - previous_close).abs()],
+                           axis=1).max(axis=1)
+    return true_range.rolling(period).mean()
+
+
+def ewm_alpha(span):
+    # Same derivation as pandas (span -> center of mass -> alpha) so streamed values match bit for bit
+    return 1.0 / (1.0 + (span - 1) / 2.0)
+
+
+def ewm_step(previous, value, alpha):
+    # One step of pandas' ewm(adjust=False).mean(); previous is None before the first bar
+    if previous is None:
+        return value
+    if previous == value:
+        return previous
+    old_weight = 1.0 - alpha
+    return (old_weight * previous + alpha * value) / (old_weight + alpha)
+
+
+def window_mean(values, window):
+    # Mean of the last `window` values, or None until the window is full
+    if len(values) < window:
+        return None
+    return math.fsum(islice(reversed(values), window)) / window
+
@@ -0,0 +1,101 @@
+import cProfile
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StageTimer:
+    # Per-symbol collector used inside the pipeline (and inside worker processes); its plain dicts
+    # travel back with the SymbolResult and are merged into an Instrumentation by the caller.
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+class Instrumentation:
+    # Run-level aggregation of stage timings and counters (trades, signals, bytes loaded) per symbol.
+    # Anything with record(symbol, timings, counters) and count(name) methods can be plugged into run_sweep instead.
+    def __init__(self):
+        self.stage_times = defaultdict(list)
+        self.symbol_times = defaultdict(float)
+        self.counters = defaultdict(float)
+        self.symbol_counters = defaultdict(lambda: defaultdict(float))
+        self.started = time.perf_counter()
+
+    def record_stage(self, stage, seconds, symbol=None):
+        self.stage_times[stage].append(seconds)
+        if symbol is not None:
+            self.symbol_times[symbol] += seconds
+
+    def count(self, name, value=1, symbol=None):
+        self.counters[name] += value
+        if symbol is not None:
+            self.symbol_counters[symbol][name] += value
+
+    def record(self, symbol, timings, counters):
+        for stage, seconds in timings.items():
+            self.record_stage(stage, seconds, symbol)
+        for name, value in counters.items():
+            self.count(name, value, symbol)
+
+    def report(self, slowest=10):
+        stages = {}
+        for stage, times in self.stage_times.items():
+            times = np.asarray(times)
+            stages[stage] = {
+                "calls": len(times),
+                "total_s": float(times.sum()),
+                "p50_ms": float(np.percentile(times, 50) * 1000),
+                "p95_ms": float(np.percentile(times, 95) * 1000),
+                "max_ms": float(times.max() * 1000),
+            }
+        slowest_symbols = sorted(self.symbol_times.items(), key=lambda item: item[1], reverse=True)[:slowest]
+        return {
+            "wall_s": time.perf_counter() - self.started,
+            "stages": stages,
+            "counters": dict(self.counters),
+            "slowest_symbols": [
+                {"symbol": symbol, "seconds": seconds, **self.symbol_counters.get(symbol, {})}
+                for symbol, seconds in slowest_symbols
+            ],
+        }
+
+    def to_json(self, path, slowest=10):
+        with open(path, "w") as f:
+            json.dump(self.report(slowest), f, indent=2)
+
+    def summary_lines(self):
+        report = self.report()
+        lines = [f"{'stage':<12} {'calls':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9}"]
+        for stage, stats in report["stages"].items():
+            lines.append(f"{stage:<12} {stats['calls']:>7} {stats['total_s']:>9.2f} "
+                         f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f}")
+        lines.append("Slowest symbols: " + ", ".join(
+            f"{row['symbol']} ({row['seconds'] * 1000:.0f} ms)" for row in report["slowest_symbols"]))
+        return lines
+
+
+@contextmanager
+def profile_to(path):
+    # cProfile hook for a single symbol; inspect the dump with `python -m pstats <path>` or snakeviz
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from backtester import TRADE_COLUMNS, compound_trades, trades_frame
+from fetch_data_module import fetch_chunks
+from metrics import trade_metrics
+from strategy_base import combine_signals
+from sweep import SymbolResult
+
+# Out-of-core runs for long (e.g. minute-bar) histories: bars are streamed chunk by chunk from the local
+# store, every strategy carries its state across chunk boundaries (Strategy.chunk_signals) and the
+# backtest carries capital, the last exit and the bars of still-open candidates (ChunkedBacktest).
+# Peak memory is bounded by the chunk size, and the trades match a single in-memory run.
+
+
+class ChunkedBacktest:
+    # backtest_fixed_holding over consecutive chunks; holding periods are in bars. The state (capital,
+    # last exit, global position and the unresolved tail) is small and JSON-serialisable, so a long run
+    # can be checkpointed after any chunk and resumed with from_state().
+    def __init__(self, holding_days=5, initial_capital=100000):
+        self.holding_days = holding_days
+        self.initial_capital = initial_capital
+        self.capital = initial_capital
+        self.position = 0  # global bar number of the first carried bar
+        self.last_exit = -1  # global bar number of the last exit
+        self.dates = pd.DatetimeIndex([])
+        self.close = np.empty(0)
+        self.signal = np.empty(0, dtype=np.int64)
+
+    def feed(self, dates, close, signal):
+        # Returns the trades that completed with this chunk, as a DataFrame with TRADE_COLUMNS
+        dates = self.dates.append(pd.DatetimeIndex(dates))
+        close = np.concatenate([self.close, np.asarray(close, dtype=np.float64)])
+        signal = np.concatenate([self.signal, np.asarray(signal, dtype=np.int64)])
+        n = len(close)
+
+        entries = np.flatnonzero((signal == 1) | (signal == -1))
+        entries = entries[entries > self.last_exit - self.position]
+        # Only candidates whose exit bar has arrived can be decided; the walk is the same as in one run
+        entries = entries[:np.searchsorted(entries + self.holding_days, n)]
+        exits = entries + self.holding_days
+        trades = compound_trades(entries, exits, signal[entries].astype(np.int8), close[entries], close[exits],
+                                 self.capital)
+        if len(trades["pnl"]):
+            self.capital = float(trades["equity"][-1])
+            self.last_exit = self.position + int(trades["exit_pos"][-1])
+
+        # Carry the bars that may still open a trade (and everything after them)
+        keep = max(n - self.holding_days, self.last_exit - self.position + 1, 0)
+        self.dates, self.close, self.signal = dates[keep:], close[keep:], signal[keep:]
+        self.position += keep
+
+        if not len(trades["pnl"]):
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+        return trades_frame(trades, dates)
+
+    def get_state(self):
+        return {"holding_days": self.holding_days, "initial_capital": self.initial_capital,
+                "capital": self.capital, "position": self.position, "last_exit": self.last_exit,
+                "dates": [str(date) for date in self.dates], "close": self.close.tolist(),
+                "signal": self.signal.tolist()}
+
+    @classmethod
+    def from_state(cls, saved):
+        backtest = cls(saved["holding_days"], saved["initial_capital"])
+        backtest.capital = saved["capital"]
+        backtest.position, backtest.last_exit = saved["position"], saved["last_exit"]
+        backtest.dates = pd.DatetimeIndex(saved["dates"])
+        backtest.close = np.asarray(saved["close"], dtype=np.float64)
+        backtest.signal = np.asarray(saved["signal"], dtype=np.int64)
+        return backtest
+
+
+def chunked_signals(chunks, strategies):
+    # Yields (chunk, signals) with each strategy's carry threaded through; more than one is combined
+    if not strategies:
+        raise ValueError("No strategies selected.")
+    carries = [None] * len(strategies)
+    for chunk in chunks:
+        signals_list = []
+        for i, (cls, params) in enumerate(strategies):
+            signals, carries[i] = cls.chunk_signals(chunk, carries[i], **params)
+            signals_list.append(signals)
+        yield chunk, signals_list[0] if len(signals_list) == 1 else combine_signals(*signals_list)
+
+
+def backtest_chunked(chunks, strategies, holding_days=5, initial_capital=100000):
+    # Whole chunked run for one symbol; only the trades (not the bars) are kept in memory
+    backtest = ChunkedBacktest(holding_days, initial_capital)
+    trades = [backtest.feed(chunk.index, chunk['Close'].to_numpy(), signals['signal'].to_numpy())
+              for chunk, signals in chunked_signals(chunks, strategies)]
+    trades = [table for table in trades if len(table)]
+    return pd.concat(trades, ignore_index=True) if trades else pd.DataFrame()
+
+
+def evaluate_symbol_chunked(symbol, strategies, holding_days=5, chunk_loader=fetch_chunks):
+    try:
+        results = backtest_chunked(chunk_loader(symbol), strategies, holding_days)
+        if results.empty:
+            raise ValueError("No trades to summarize.")
+        metrics = trade_metrics(results)
+        return SymbolResult(symbol, cagr=metrics["CAGR (%)"], trades=len(results), metrics=metrics)
+    except Exception as e:
+        return SymbolResult(symbol, error=str(e))
+
+
+def run_chunked_sweep(symbols, strategies, holding_days=5, interval='1m', chunk_rows=100_000, workers=None,
+                      chunk_loader=None):
+    # run_sweep counterpart for intraday histories that do not fit in memory: one symbol per worker
+    # process, each streaming its bars. Yields SymbolResults in input order.
+    chunk_loader = chunk_loader or partial(fetch_chunks, interval=interval, chunk_rows=chunk_rows)
+    workers = os.cpu_count() if workers is None else workers
+    evaluate = partial(evaluate_symbol_chunked, strategies=strategies, holding_days=holding_days,
+                       chunk_loader=chunk_loader)
+    if workers == 0:
+        yield from map(evaluate, symbols)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(evaluate, symbols)
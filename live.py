@@ -0,0 +1,63 @@
+import json
+import logging
+
+import pandas as pd
+
+from fetch_data_module import fetch_data
+from strategies import STRATEGIES
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_CLASSES = {cls.__name__: cls for cls, _ in STRATEGIES.values()}
+
+
+# Nightly updates: streaming state for every (symbol, strategy) is built once from history, persisted
+# as JSON and then advanced one bar at a time with Strategy.update() instead of recomputing history.
+
+def build_states(symbols, strategies, loader=fetch_data):
+    states = {}
+    for symbol in symbols:
+        try:
+            data = loader(symbol)
+        except Exception as e:
+            logger.warning("Error loading %s: %s", symbol, e)
+            continue
+        saved = []
+        for cls, params in strategies:
+            strategy = cls(data, **params)
+            strategy.warm_up()
+            saved.append(strategy.get_state())
+        states[symbol] = {"last_date": str(data.index[-1]) if len(data) else None, "strategies": saved}
+    return states
+
+
+def save_states(path, states):
+    with open(path, "w") as f:
+        json.dump(states, f)
+
+
+def load_states(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def update_states(states, bars):
+    # bars: {symbol: {"Date": ..., "Close": ..., "Volume": ...}}; returns {symbol: combined signal}.
+    # Bars on or before a symbol's last processed date are ignored, so re-running a night is harmless.
+    signals = {}
+    for symbol, bar in bars.items():
+        entry = states.get(symbol)
+        if entry is None:
+            continue
+        date = pd.Timestamp(bar["Date"])
+        if entry["last_date"] is not None and date <= pd.Timestamp(entry["last_date"]):
+            continue
+
+        total = 0
+        for i, saved in enumerate(entry["strategies"]):
+            strategy = STRATEGY_CLASSES[saved["strategy"]].from_state(saved)
+            total += strategy.update(bar)
+            entry["strategies"][i] = strategy.get_state()
+        entry["last_date"] = str(date)
+        signals[symbol] = max(-1, min(1, total))
+    return signals
@@ -1,18 +1,43 @@
+from collections import deque
+
+import numpy as np
 import pandas as pd
+from indicators import window_mean
+from strategy_base import Strategy
+
+class MovingAverageCrossover(Strategy):
+    param_names = ("short_window", "long_window")
+    # Buy when the short SMA crosses above the long SMA
+    rules = ((1, "cross_above(sma(close, short_window), sma(close, long_window))"),)
 
-class MovingAverageCrossover:
     def __init__(self, data: pd.DataFrame, short_window=50, long_window=200):
-        self.data = data.copy()
+        super().__init__(data)
         self.short_window = short_window
         self.long_window = long_window
-        self.signals = pd.DataFrame(index=data.index)
-        self.signals["signal"] = 0
 
-    def generate_signals(self):
-        short_sma = self.data["Close"].rolling(window=self.short_window).mean()
-        long_sma = self.data["Close"].rolling(window=self.long_window).mean()
+    def lookback(self):
+        # Both averages on the previous bar as well
+        return max(self.short_window, self.long_window)
+
+    @classmethod
+    def generate_panel_signals(cls, panel, short_window=50, long_window=200):
+        close = panel.frame("Close")
+        short_sma = close.rolling(window=short_window).mean()
+        long_sma = close.rolling(window=long_window).mean()
         condition = (short_sma > long_sma) & (short_sma.shift(1) <= long_sma.shift(1))
-        self.signals.loc[condition, "signal"] = 1
+        return condition.to_numpy().astype(np.int8)
+
+    def initial_state(self):
+        return {"closes": deque(maxlen=self.long_window), "short_sma": None, "long_sma": None}
+
+    def update(self, bar):
+        state = self.state
+        state["closes"].append(bar["Close"])
+        short_sma = window_mean(state["closes"], self.short_window)
+        long_sma = window_mean(state["closes"], self.long_window)
+        prev_short, prev_long = state["short_sma"], state["long_sma"]
+        state["short_sma"], state["long_sma"] = short_sma, long_sma
 
-        print(f"📊 MA Crossover Signals: {self.signals['signal'].sum()} total")
-        return self.signals
+        if None in (short_sma, long_sma, prev_short, prev_long):
+            return 0
+        return 1 if short_sma > long_sma and prev_short <= prev_long else 0
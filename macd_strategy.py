@@ -1,24 +1,81 @@
+import numpy as np
 import pandas as pd
+from indicators import ewm_alpha, ewm_step
 from strategy_base import Strategy
 
 class MACDStrategy(Strategy):
+    param_names = ('short_window', 'long_window', 'signal_window')
+    # Buy when MACD crosses above its signal line, sell when it crosses below
+    MACD = "ema(close, short_window) - ema(close, long_window)"
+    rules = ((1, f"cross_above({MACD}, ema({MACD}, signal_window))"),
+             (-1, f"cross_below({MACD}, ema({MACD}, signal_window))"))
+
     def __init__(self, data: pd.DataFrame, short_window=12, long_window=26, signal_window=9):
         super().__init__(data)
         self.short_window = short_window
         self.long_window = long_window
         self.signal_window = signal_window
 
-    def generate_signals(self):
-        close = self.data['Close']
-        ema_short = close.ewm(span=self.short_window, adjust=False).mean()
-        ema_long = close.ewm(span=self.long_window, adjust=False).mean()
+    @classmethod
+    def chunk_signals(cls, chunk, carry=None, short_window=12, long_window=26, signal_window=9):
+        # An EWM depends on the whole history, so the carry holds the last EWM values instead of past bars.
+        # Prepending them re-seeds ewm(adjust=False), which keeps no other state, so the continued values
+        # (and signals) are exactly those of a single in-memory run.
+        if chunk.empty:
+            return pd.DataFrame({'signal': 0}, index=chunk.index), carry
+
+        def ewm(values, span, seed):
+            if seed is not None:
+                values = pd.concat([pd.Series([seed]), values], ignore_index=True)
+            return values.ewm(span=span, adjust=False).mean()
+
+        carry = carry or {}
+        close = chunk['Close'].reset_index(drop=True)
+        ema_short = ewm(close, short_window, carry.get("ema_short"))
+        ema_long = ewm(close, long_window, carry.get("ema_long"))
+        macd = ema_short - ema_long
+        # With a carry, row 0 of every series is the previous chunk's last bar
+        signal = ewm(macd.iloc[1:] if carry else macd, signal_window, carry.get("signal"))
+
+        up = ((macd > signal) & (macd.shift(1) <= signal.shift(1))).to_numpy()[-len(chunk):]
+        down = ((macd < signal) & (macd.shift(1) >= signal.shift(1))).to_numpy()[-len(chunk):]
+        signals = pd.DataFrame({'signal': 0}, index=chunk.index)
+        signals.loc[up, 'signal'] = 1
+        signals.loc[down, 'signal'] = -1
+        return signals, {"ema_short": float(ema_short.iloc[-1]), "ema_long": float(ema_long.iloc[-1]),
+                         "signal": float(signal.iloc[-1])}
+
+    @classmethod
+    def generate_panel_signals(cls, panel, short_window=12, long_window=26, signal_window=9):
+        close = panel.frame('Close')
+        ema_short = close.ewm(span=short_window, adjust=False).mean()
+        ema_long = close.ewm(span=long_window, adjust=False).mean()
 
         macd = ema_short - ema_long
-        signal = macd.ewm(span=self.signal_window, adjust=False).mean()
+        signal = macd.ewm(span=signal_window, adjust=False).mean()
+
+        signals = np.zeros(panel.shape, dtype=np.int8)
+        signals[((macd > signal) & (macd.shift(1) <= signal.shift(1))).to_numpy()] = 1
+        signals[((macd < signal) & (macd.shift(1) >= signal.shift(1))).to_numpy()] = -1
+        return signals
+
+    def initial_state(self):
+        return {"ema_short": None, "ema_long": None, "macd": None, "signal": None}
 
-        self.signals['signal'] = 0
-        self.signals.loc[(macd > signal) & (macd.shift(1) <= signal.shift(1)), 'signal'] = 1
-        self.signals.loc[(macd < signal) & (macd.shift(1) >= signal.shift(1)), 'signal'] = -1
+    def update(self, bar):
+        state = self.state
+        close = bar['Close']
+        state["ema_short"] = ewm_step(state["ema_short"], close, ewm_alpha(self.short_window))
+        state["ema_long"] = ewm_step(state["ema_long"], close, ewm_alpha(self.long_window))
+        macd = state["ema_short"] - state["ema_long"]
+        signal = ewm_step(state["signal"], macd, ewm_alpha(self.signal_window))
+        prev_macd, prev_signal = state["macd"], state["signal"]
+        state["macd"], state["signal"] = macd, signal
 
-        print(f"\n📊 MACD Strategy: {self.signals['signal'].value_counts().to_dict()}")
-        return self.signals
+        if prev_macd is None:
+            return 0
+        if macd > signal and prev_macd <= prev_signal:
+            return 1
+        if macd < signal and prev_macd >= prev_signal:
+            return -1
+        return 0
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = ["Trades", "Win Rate (%)", "Total Return", "CAGR (%)", "Sharpe", "Sortino",
+                  "Max Drawdown (%)", "Exposure (%)", "Profit Factor", "Avg Return (%)"]
+
+DAY_NS = 86400 * 10**9
+
+
+def _metrics(starts, pnl, return_pct, equity, entry_ns, exit_ns, initial_capital):
+    # Core of every entry point: trades of each group are contiguous and in entry order, groups begin at
+    # `starts`. Every metric is a segmented reduction over the flat arrays, so one call covers any number
+    # of symbols. Entry/exit times are int64 nanoseconds.
+    n = np.diff(np.append(starts, len(pnl)))
+    group = np.repeat(np.arange(len(starts)), n)
+    ends = starts + n - 1
+
+    total_return = np.add.reduceat(pnl, starts)
+    wins = np.add.reduceat((pnl > 0).astype(np.int64), starts)
+    gross_profit = np.add.reduceat(np.where(pnl > 0, pnl, 0.0), starts)
+    gross_loss = np.add.reduceat(np.where(pnl < 0, -pnl, 0.0), starts)
+
+    span_ns = np.maximum.reduceat(exit_ns, starts) - np.minimum.reduceat(entry_ns, starts)
+    # Whole days, like Timedelta.days, so CAGR matches the original summary
+    years = (span_ns // DAY_NS) / 365.0
+    valid = years > 0
+    safe_years = np.where(valid, years, 1.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # CAGR from the compounded equity at the last exit
+        cagr = np.where(valid, ((equity[ends] / initial_capital) ** (1 / safe_years) - 1) * 100, 0.0)
+
+        # Per-trade return on the account (equity before the trade), annualised by trades per year
+        trade_returns = pnl / (equity - pnl)
+        mean = np.add.reduceat(trade_returns, starts) / n
+        deviation = trade_returns - mean[group]
+        std = np.sqrt(np.add.reduceat(deviation * deviation, starts) / (n - 1))
+        downside = np.sqrt(np.add.reduceat(np.minimum(trade_returns, 0.0) ** 2, starts) / n)
+        annualise = np.sqrt(n / safe_years)
+        sharpe = np.where(valid & (std > 0), mean / std * annualise, np.nan)
+        sortino = np.where(valid & (downside > 0), mean / downside * annualise, np.nan)
+
+        # Drawdown of the exit-to-exit equity curve, which starts at initial_capital
+        peak = pd.Series(equity).groupby(group).cummax().to_numpy()
+        drawdown = equity / np.maximum(peak, initial_capital) - 1
+        max_drawdown = np.minimum.reduceat(drawdown, starts) * 100
+
+        # Share of the first-entry to last-exit span spent in a position (trades never overlap)
+        held_ns = np.add.reduceat(exit_ns - entry_ns, starts)
+        exposure = np.where(span_ns > 0, held_ns / span_ns * 100, np.nan)
+
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss,
+                                 np.where(gross_profit > 0, np.inf, np.nan))
+
+    return {
+        "Trades": n,
+        "Win Rate (%)": wins / n * 100,
+        "Total Return": total_return,
+        "CAGR (%)": cagr,
+        "Sharpe": sharpe,
+        "Sortino": sortino,
+        "Max Drawdown (%)": max_drawdown,
+        "Exposure (%)": exposure,
+        "Profit Factor": profit_factor,
+        "Avg Return (%)": np.add.reduceat(return_pct, starts) / n,
+    }
+
+
+def _empty_record():
+    record = dict.fromkeys(METRIC_COLUMNS, np.nan)
+    record.update({"Trades": 0, "Win Rate (%)": 0.0, "Total Return": 0.0})
+    return record
+
+
+def _record(metrics):
+    return {name: values[0].item() for name, values in metrics.items()}
+
+
+def _ns(dates):
+    return np.asarray(dates, dtype="datetime64[ns]").astype(np.int64)
+
+
+def array_metrics(trades, dates, initial_capital=100000):
+    # Record for fixed_holding_trades output; dates are the row labels its positions refer to
+    if len(trades["pnl"]) == 0:
+        return _empty_record()
+    dates = _ns(dates)
+    return _record(_metrics(np.zeros(1, dtype=np.intp), trades["pnl"], trades["return_pct"], trades["equity"],
+                            dates[trades["entry_pos"]], dates[trades["exit_pos"]], initial_capital))
+
+
+def trade_metrics(trades, initial_capital=100000):
+    # Record for one symbol's trade table as returned by backtest_fixed_holding
+    if len(trades) == 0:
+        return _empty_record()
+    return _record(_metrics(np.zeros(1, dtype=np.intp), trades["PnL"].to_numpy(dtype=np.float64),
+                            trades["Return (%)"].to_numpy(dtype=np.float64),
+                            trades["Equity"].to_numpy(dtype=np.float64),
+                            _ns(trades["Entry Date"]), _ns(trades["Exit Date"]), initial_capital))
+
+
+def universe_metrics(trades, initial_capital=100000, by="Symbol"):
+    # One row per `by` value for a stacked trade table (e.g. backtest_fixed_holding_panel output).
+    # Each symbol's trades must be in entry order; symbols may be interleaved.
+    if len(trades) == 0:
+        return pd.DataFrame(columns=METRIC_COLUMNS, index=pd.Index([], name=by))
+    codes, names = pd.factorize(trades[by], sort=False)
+    order = np.argsort(codes, kind="stable")
+    starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+
+    def column(name, dtype=np.float64):
+        return trades[name].to_numpy(dtype=dtype)[order]
+
+    metrics = _metrics(starts, column("PnL"), column("Return (%)"), column("Equity"),
+                       _ns(trades["Entry Date"])[order], _ns(trades["Exit Date"])[order], initial_capital)
+    return pd.DataFrame(metrics, index=pd.Index(names, name=by), columns=METRIC_COLUMNS)
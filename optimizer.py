@@ -0,0 +1,150 @@
+import logging
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from backtester import fixed_holding_trades
+from fetch_data_module import fetch_data
+from indicators import rsi
+from metrics import array_metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Each *_grid function computes every indicator once per distinct window/span, then evaluates all
+# parameter combinations together as (dates x combinations) arrays. They return the list of
+# parameter dicts and an int8 signal matrix whose columns follow that list and match the signals
+# of the corresponding Strategy class exactly.
+
+def _shift(matrix):
+    shifted = np.empty_like(matrix)
+    shifted[0] = np.nan
+    shifted[1:] = matrix[:-1]
+    return shifted
+
+
+def _crossings(fast, slow):
+    fast_prev, slow_prev = _shift(fast), _shift(slow)
+    up = (fast > slow) & (fast_prev <= slow_prev)
+    down = (fast < slow) & (fast_prev >= slow_prev)
+    return up, down
+
+
+def breakout_grid(data, window=(252,)):
+    close = data['Close']
+    params = [{"window": w} for w in window]
+    highs = np.column_stack([close.rolling(window=w).max().to_numpy() for w in window])
+    condition = close.to_numpy()[:, None] > _shift(highs)
+    return params, condition.astype(np.int8)
+
+
+def ma_crossover_grid(data, short_window=(50,), long_window=(200,)):
+    close = data['Close']
+    params = [{"short_window": s, "long_window": l} for s, l in product(short_window, long_window) if s < l]
+    if not params:
+        raise ValueError("Grid has no combination with short_window < long_window.")
+    means = {w: close.rolling(window=w).mean().to_numpy() for w in set(short_window) | set(long_window)}
+    short = np.column_stack([means[p["short_window"]] for p in params])
+    long = np.column_stack([means[p["long_window"]] for p in params])
+    up, _ = _crossings(short, long)
+    return params, up.astype(np.int8)
+
+
+def rsi_grid(data, period=(14,)):
+    params = [{"period": p} for p in period]
+    levels = {p: rsi(data['Close'], p).to_numpy() for p in period}
+    rsi_now = np.column_stack([levels[p] for p in period])
+    rsi_prev = _shift(rsi_now)
+    signals = np.zeros(rsi_now.shape, dtype=np.int8)
+    signals[(rsi_now > 30) & (rsi_prev <= 30)] = -1
+    signals[(rsi_now < 70) & (rsi_prev >= 70)] = 1
+    return params, signals
+
+
+def volume_spike_grid(data, volume_window=(20,), volume_threshold=(2.0,)):
+    volume = data['Volume']
+    params = [{"volume_window": w, "volume_threshold": t} for w, t in product(volume_window, volume_threshold)]
+    averages = {w: volume.rolling(window=w).mean().to_numpy() for w in volume_window}
+    avg = np.column_stack([averages[p["volume_window"]] for p in params])
+    thresholds = np.array([p["volume_threshold"] for p in params])
+    spike = volume.to_numpy()[:, None] > thresholds * avg
+    momentum = (data['Close'] > data['Close'].shift(1)).to_numpy()[:, None]
+    signals = np.zeros(avg.shape, dtype=np.int8)
+    signals[spike & momentum] = 1
+    signals[spike & ~momentum] = -1
+    return params, signals
+
+
+def macd_grid(data, short_window=(12,), long_window=(26,), signal_window=(9,)):
+    close = data['Close']
+    emas = {span: close.ewm(span=span, adjust=False).mean().to_numpy() for span in set(short_window) | set(long_window)}
+    pairs = [(s, l) for s, l in product(short_window, long_window) if s < l]
+    if not pairs:
+        raise ValueError("Grid has no combination with short_window < long_window.")
+    macd = pd.DataFrame(np.column_stack([emas[s] - emas[l] for s, l in pairs]))
+
+    params, macd_columns, signal_columns = [], [], []
+    # One EWM call per signal span covers every (short, long) pair at once
+    for span in signal_window:
+        signal_line = macd.ewm(span=span, adjust=False).mean().to_numpy()
+        for j, (s, l) in enumerate(pairs):
+            params.append({"short_window": s, "long_window": l, "signal_window": span})
+            macd_columns.append(j)
+            signal_columns.append(signal_line[:, j])
+
+    up, down = _crossings(macd.to_numpy()[:, macd_columns], np.column_stack(signal_columns))
+    signals = np.zeros(up.shape, dtype=np.int8)
+    signals[up] = 1
+    signals[down] = -1
+    return params, signals
+
+
+GRID_FUNCTIONS = {
+    "Breakout52Week": breakout_grid,
+    "MovingAverageCrossover": ma_crossover_grid,
+    "RSIStrategy": rsi_grid,
+    "VolumeSpikeStrategy": volume_spike_grid,
+    "MACDStrategy": macd_grid,
+}
+
+
+def optimize(data, grids, holding_days=(5,), initial_capital=100000, rank_by="CAGR (%)"):
+    # grids: {"MACDStrategy": {"short_window": [8, 12], ...}, ...}; missing params use the defaults
+    close = data['Close'].to_numpy()
+    rows = []
+    for name, grid in grids.items():
+        params, signals = GRID_FUNCTIONS[name](data, **grid)
+        for j, h in product(range(len(params)), holding_days):
+            trades = fixed_holding_trades(close, signals[:, j], holding_days=h, initial_capital=initial_capital)
+            rows.append({"Strategy": name, "Params": params[j], "Holding Days": h,
+                         **array_metrics(trades, data.index, initial_capital)})
+
+    table = pd.DataFrame(rows)
+    return table.sort_values(rank_by, ascending=False, na_position="last").reset_index(drop=True)
+
+
+def optimize_universe(symbols, grids, holding_days=(5,), initial_capital=100000, loader=fetch_data):
+    # Runs optimize() per symbol and ranks configurations by their median CAGR across the universe
+    tables = []
+    for symbol in symbols:
+        try:
+            table = optimize(loader(symbol), grids, holding_days, initial_capital)
+        except Exception as e:
+            logger.warning("Error optimizing %s: %s", symbol, e)
+            continue
+        table.insert(0, "Symbol", symbol)
+        tables.append(table)
+    if not tables:
+        return pd.DataFrame()
+
+    per_symbol = pd.concat(tables, ignore_index=True)
+    per_symbol["Config"] = per_symbol["Strategy"] + " " + per_symbol["Params"].astype(str)
+    ranked = per_symbol.groupby(["Config", "Holding Days"]).agg(
+        **{"Symbols": ("Symbol", "count"),
+           "Median CAGR (%)": ("CAGR (%)", "median"),
+           "Mean CAGR (%)": ("CAGR (%)", "mean"),
+           "Positive CAGR (%)": ("CAGR (%)", lambda c: (c > 0).mean() * 100),
+           "Trades": ("Trades", "sum")}
+    )
+    return ranked.sort_values("Median CAGR (%)", ascending=False).reset_index()
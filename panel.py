@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtester import backtest_fixed_holding_panel
+from data_store import OHLCV_COLUMNS
+from fetch_data_module import fetch_data
+from metrics import METRIC_COLUMNS, universe_metrics
+
+
+class Panel:
+    # OHLCV for a whole universe as aligned (dates x symbols) float arrays, one per field.
+    # Symbols are aligned on the union of their trading dates; dates a symbol has no bar for are NaN.
+    def __init__(self, dates, symbols, fields, failed=None):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.fields = fields
+        self.failed = failed or {}
+
+    def frame(self, field):
+        # Wide DataFrame view over the field array, so pandas rolling/EWM run on every column at once
+        return pd.DataFrame(self.fields[field], index=self.dates, columns=self.symbols, copy=False)
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.symbols)
+
+    def gapped_columns(self):
+        # Symbols missing dates between their first and last bar. Rolling/EWM/shift over the union axis would
+        # run across those NaN rows, so their indicators must be computed on their own bars instead.
+        valid = ~np.isnan(self.fields['Close'])
+        first = valid.argmax(axis=0)
+        last = len(self.dates) - 1 - valid[::-1].argmax(axis=0)
+        return np.flatnonzero(valid.any(axis=0) & (valid.sum(axis=0) < last - first + 1)).tolist()
+
+    def column(self, j):
+        # (row positions, one-symbol Panel on just the dates symbol j has bars for)
+        rows = np.flatnonzero(~np.isnan(self.fields['Close'][:, j]))
+        fields = {field: matrix[rows, j:j + 1] for field, matrix in self.fields.items()}
+        return rows, Panel(self.dates[rows], [self.symbols[j]], fields)
+
+
+def load_panel(symbols, loader=fetch_data, io_workers=8):
+    frames = {}
+    failed = {}
+
+    def load(symbol):
+        try:
+            return symbol, loader(symbol), None
+        except Exception as e:
+            return symbol, None, str(e)
+
+    with ThreadPoolExecutor(io_workers) as pool:
+        for symbol, data, error in pool.map(load, symbols):
+            if error is not None:
+                failed[symbol] = error
+            elif data.empty:
+                failed[symbol] = "No data"
+            else:
+                frames[symbol] = data
+
+    loaded = list(frames)
+    dates = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values()))), name='Date')
+    fields = {}
+    for field in OHLCV_COLUMNS:
+        matrix = np.full((len(dates), len(loaded)), np.nan)
+        for j, symbol in enumerate(loaded):
+            column = frames[symbol][field]
+            matrix[dates.get_indexer(column.index), j] = column.to_numpy(dtype=np.float64)
+        fields[field] = matrix
+    return Panel(dates, loaded, fields, failed)
+
+
+def generate_panel_signals(panel, strategies):
+    # strategies: list of (strategy class, params) as used by sweep; more than one is combined.
+    # Gapped symbols are recomputed on their own bars so their signals match the per-symbol run.
+    if not strategies:
+        raise ValueError("No strategies selected.")
+    compact = [(j, *panel.column(j)) for j in panel.gapped_columns()]
+    total = None
+    for cls, params in strategies:
+        signals = cls.generate_panel_signals(panel, **params).astype(np.int64)
+        for j, rows, single in compact:
+            signals[:, j] = 0
+            signals[rows, j] = cls.generate_panel_signals(single, **params)[:, 0]
+        total = signals if total is None else total + signals
+    if len(strategies) > 1:
+        np.clip(total, -1, 1, out=total)
+    return total
+
+
+def run_panel_sweep(symbols, strategies, holding_days=5, initial_capital=100000, loader=fetch_data):
+    # Panel counterpart of sweep.run_sweep: returns one metrics row per symbol (see metrics.py)
+    panel = load_panel(symbols, loader)
+    signals = generate_panel_signals(panel, strategies)
+    trades = backtest_fixed_holding_panel(panel, signals, holding_days, initial_capital)
+
+    rows = universe_metrics(trades, initial_capital).reindex(pd.Index(panel.symbols, name="Symbol"))
+    rows["Trades"] = rows["Trades"].fillna(0).astype(int)
+    return rows[METRIC_COLUMNS].reset_index(), panel.failed
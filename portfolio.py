@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fetch_data_module import fetch_data
+from panel import generate_panel_signals, load_panel
+
+
+@dataclass
+class PortfolioResult:
+    equity: pd.Series  # daily mark-to-market equity
+    positions: pd.Series  # open positions at each close
+    trades: pd.DataFrame
+
+
+def exit_rows(valid, rows, cols, holding_days):
+    # Row of the bar `holding_days` bars after (rows, cols) in each symbol's own history, -1 if past the end
+    n_dates = valid.shape[0]
+    bar_no = np.cumsum(valid, axis=0) - 1
+    bars_per_symbol = valid.sum(axis=0)
+    # Valid cells ordered symbol by symbol, so a symbol's k-th bar sits at symbol_start + k
+    valid_cells = np.flatnonzero(valid.T)
+    symbol_start = np.concatenate(([0], np.cumsum(bars_per_symbol)[:-1]))
+    target = bar_no[rows, cols] + holding_days
+    ok = target < bars_per_symbol[cols]
+    result = np.full(len(rows), -1, dtype=np.int64)
+    result[ok] = valid_cells[symbol_start[cols[ok]] + target[ok]] % n_dates
+    return result
+
+
+def backtest_portfolio(panel, signals, holding_days=5, initial_capital=1000000, max_positions=10,
+                       position_size=None):
+    # One capital pool across the whole panel. Signals are merged into a single time-ordered event
+    # stream; each day exits are settled first, then new entries are taken in symbol order while
+    # slots and cash last, each sized at `position_size` (default 1 / max_positions) of current equity.
+    # As in backtest_fixed_holding, a symbol holds at most one position and re-enters only after its exit day.
+    close = panel.fields['Close']
+    n_dates, n_symbols = close.shape
+    valid = ~np.isnan(close)
+    marks = pd.DataFrame(close).ffill().to_numpy()
+    position_size = position_size or 1.0 / max_positions
+
+    rows, cols = np.nonzero((signals != 0) & valid)  # row-major: ordered by date, then symbol
+    event_exits = exit_rows(valid, rows, cols, holding_days)
+    day_bounds = np.searchsorted(rows, np.arange(n_dates + 1))
+
+    # Open positions, indexed by symbol id
+    qty = np.zeros(n_symbols)
+    side = np.zeros(n_symbols, dtype=np.int8)
+    entry_price = np.zeros(n_symbols)
+    entry_row = np.full(n_symbols, -1, dtype=np.int64)
+    exit_row = np.full(n_symbols, -1, dtype=np.int64)
+    last_exit_row = np.full(n_symbols, -1, dtype=np.int64)
+
+    cash = float(initial_capital)
+    open_count = 0
+    equity = np.empty(n_dates)
+    open_positions = np.empty(n_dates, dtype=np.int64)
+    trade_parts = []
+
+    def marked_equity(t):
+        held = np.flatnonzero(qty)
+        return cash + float((qty[held] * entry_price[held]
+                             + side[held] * (marks[t, held] - entry_price[held]) * qty[held]).sum())
+
+    for t in range(n_dates):
+        due = np.flatnonzero(exit_row == t)
+        if len(due):
+            exit_prices = close[t, due]
+            deployed = qty[due] * entry_price[due]
+            pnl = side[due] * (exit_prices - entry_price[due]) * qty[due]
+            cash += float((deployed + pnl).sum())
+            trade_parts.append((due, side[due].copy(), entry_row[due].copy(), entry_price[due].copy(),
+                                np.full(len(due), t), exit_prices, qty[due].copy(), pnl, deployed))
+            qty[due] = 0
+            exit_row[due] = -1
+            last_exit_row[due] = t
+            open_count -= len(due)
+
+        current_equity = marked_equity(t)
+
+        for k in range(day_bounds[t], day_bounds[t + 1]):
+            if open_count >= max_positions:
+                break
+            j = cols[k]
+            if qty[j] or event_exits[k] < 0 or last_exit_row[j] >= t:
+                continue
+            price = close[t, j]
+            size = min(current_equity * position_size, cash) // price
+            if size <= 0:
+                continue
+            cash -= size * price
+            qty[j], side[j], entry_price[j] = size, signals[t, j], price
+            entry_row[j], exit_row[j] = t, event_exits[k]
+            open_count += 1
+
+        equity[t] = marked_equity(t)
+        open_positions[t] = open_count
+
+    if trade_parts:
+        symbol_ids, sides, entries, entry_prices, exits, exit_prices, qtys, pnls, deployed = (
+            np.concatenate(part) for part in zip(*trade_parts))
+    else:
+        symbol_ids = sides = entries = exits = np.empty(0, dtype=np.int64)
+        entry_prices = exit_prices = qtys = pnls = deployed = np.empty(0)
+    trades = pd.DataFrame({
+        "Symbol": np.asarray(panel.symbols, dtype=object)[symbol_ids],
+        "Signal": np.where(sides == 1, "BUY", "SELL").astype(object),
+        "Entry Date": panel.dates[entries],
+        "Entry Price": entry_prices,
+        "Exit Date": panel.dates[exits],
+        "Exit Price": exit_prices,
+        "Qty": qtys,
+        "PnL": pnls,
+        "Return (%)": pnls / deployed * 100 if len(deployed) else np.empty(0),
+        "Capital Deployed": deployed,
+    })
+    return PortfolioResult(
+        equity=pd.Series(equity, index=panel.dates, name="Equity"),
+        positions=pd.Series(open_positions, index=panel.dates, name="Open Positions"),
+        trades=trades,
+    )
+
+
+def run_portfolio(symbols, strategies, holding_days=5, initial_capital=1000000, max_positions=10,
+                  position_size=None, loader=fetch_data):
+    panel = load_panel(symbols, loader)
+    signals = generate_panel_signals(panel, strategies)
+    return backtest_portfolio(panel, signals, holding_days, initial_capital, max_positions, position_size)
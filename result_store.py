@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtester import ENGINE_VERSION, TRADE_COLUMNS
+from expr import strategy_params
+from metrics import METRIC_COLUMNS
+
+# SQLite store of per-symbol backtest results. Each result is keyed by a hash of the symbol's data
+# (data_version), the strategy classes with their full parameters, holding_days and ENGINE_VERSION,
+# so a re-run only recomputes symbols whose bars or configuration changed. Metrics are stored as
+# indexed columns for queries; trades live in their own table.
+
+METRIC_SQL = dict(zip(METRIC_COLUMNS, ["trades", "win_rate", "total_return", "cagr", "sharpe", "sortino",
+                                       "max_drawdown", "exposure", "profit_factor", "avg_return"]))
+TRADE_SQL = dict(zip(TRADE_COLUMNS, ["signal", "entry_date", "entry_price", "exit_date", "exit_price", "pnl",
+                                     "return_pct", "capital_deployed", "equity"]))
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    config_key TEXT NOT NULL,
+    label TEXT NOT NULL,
+    holding_days INTEGER NOT NULL,
+    engine_version INTEGER NOT NULL,
+    created REAL NOT NULL,
+    error TEXT,
+    {", ".join(f"{column} REAL" for column in METRIC_SQL.values())}
+);
+CREATE INDEX IF NOT EXISTS results_config ON results (config_key, cagr);
+CREATE INDEX IF NOT EXISTS results_symbol ON results (symbol, config_key, created);
+CREATE TABLE IF NOT EXISTS trades (
+    key TEXT NOT NULL,
+    {", ".join(f"{column} {'TEXT' if column in ('signal', 'entry_date', 'exit_date') else 'REAL'}"
+               for column in TRADE_SQL.values())}
+);
+CREATE INDEX IF NOT EXISTS trades_key ON trades (key);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    config_key TEXT NOT NULL,
+    label TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_results (
+    run_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    key TEXT NOT NULL,
+    cached INTEGER NOT NULL,
+    PRIMARY KEY (run_id, symbol)
+);
+"""
+
+_open_result_stores = {}
+
+
+def open_result_store(path):
+    # One connection per store per process; also what pickled stores unpickle to in workers
+    path = os.path.abspath(path)
+    if path not in _open_result_stores:
+        _open_result_stores[path] = ResultStore(path)
+    return _open_result_stores[path]
+
+
+def data_version(data):
+    # Content hash of the bars (index included), so refreshed or corrected data gets a new key
+    hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    return hashlib.sha1(hashed.tobytes() + repr(list(data.columns)).encode()).hexdigest()
+
+
+def strategy_config(strategies):
+    # [(class name, every constructor parameter)] with defaults filled in, so ({}) and the explicit
+    # default values map to the same key
+    return [[cls.__name__, strategy_params(cls, params)] for cls, params in strategies]
+
+
+def config_label(strategies, holding_days, exit_rules=None):
+    parts = [f"{name}({', '.join(f'{k}={v}' for k, v in params.items())})"
+             for name, params in strategy_config(strategies)]
+    rules = "".join(f" {name}={value}" for name, value in sorted((exit_rules or {}).items()))
+    return f"{' + '.join(parts)} hold={holding_days}{rules}"
+
+
+def config_key(strategies, holding_days, exit_rules=None):
+    config = {"strategies": strategy_config(strategies), "holding_days": holding_days,
+              "engine_version": ENGINE_VERSION}
+    if any(cls.rules for cls, _ in strategies):
+        # Editing a strategy's expressions changes its key without a class rename
+        config["rules"] = [[list(rule) for rule in cls.rules] for cls, _ in strategies]
+    if exit_rules:
+        # Only present when set, so fixed-holding keys are unchanged
+        config["exit_rules"] = exit_rules
+    payload = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def result_key(version, config):
+    return hashlib.sha256(f"{version}:{config}".encode()).hexdigest()
+
+
+class ResultStore:
+    def __init__(self, path="results.db"):
+        self.path = os.path.abspath(path)
+        # Shared by the sweep's threads; writes from worker processes are serialised by SQLite's lock
+        self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+
+    def __reduce__(self):
+        # Ship only the path to worker processes; they open their own connection
+        return open_result_store, (self.path,)
+
+    def get(self, key):
+        # Cached (metrics record, error) for a result key, or None
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT error, {', '.join(METRIC_SQL.values())} FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        metrics = {name: np.nan if value is None else value for name, value in zip(METRIC_SQL, row[1:])}
+        metrics["Trades"] = 0 if np.isnan(metrics["Trades"]) else int(metrics["Trades"])
+        return metrics, row[0]
+
+    def put(self, key, symbol, version, strategies, holding_days, metrics=None, trades=None, error=None,
+            exit_rules=None):
+        metrics = metrics or {}
+        values = [metrics.get(name) for name in METRIC_SQL]
+        values = [None if isinstance(v, float) and np.isnan(v) else v for v in values]
+        rows = []
+        if trades is not None and len(trades):
+            table = trades[TRADE_COLUMNS].copy()
+            for column in ("Entry Date", "Exit Date"):
+                table[column] = table[column].astype(str)
+            rows = [(key, *row) for row in table.itertuples(index=False)]
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM trades WHERE key = ?", (key,))
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO results (key, symbol, data_version, config_key, label, holding_days, "
+                f"engine_version, created, error, {', '.join(METRIC_SQL.values())}) "
+                f"VALUES ({', '.join('?' * (9 + len(METRIC_SQL)))})",
+                (key, symbol, version, config_key(strategies, holding_days, exit_rules),
+                 config_label(strategies, holding_days, exit_rules), holding_days, ENGINE_VERSION, time.time(), error,
+                 *values))
+            self.connection.executemany(
+                f"INSERT INTO trades (key, {', '.join(TRADE_SQL.values())}) "
+                f"VALUES ({', '.join('?' * (1 + len(TRADE_SQL)))})", rows)
+
+    def start_run(self, strategies, holding_days, exit_rules=None):
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started, config_key, label) VALUES (?, ?, ?)",
+                (time.time(), config_key(strategies, holding_days, exit_rules),
+                 config_label(strategies, holding_days, exit_rules)))
+        return cursor.lastrowid
+
+    def add_to_run(self, run_id, symbol, key, cached):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO run_results VALUES (?, ?, ?, ?)",
+                                    (run_id, symbol, key, int(cached)))
+
+    def query(self, where=None, params=(), strategies=None, holding_days=None, exit_rules=None, latest=True):
+        # e.g. query("cagr > ?", (16,), strategies=[(MACDStrategy, {})], holding_days=5).
+        # `where` is SQL over the results columns (symbol, cagr, sharpe, max_drawdown, trades, ...).
+        # latest=True keeps only the newest data version of each (symbol, configuration).
+        clauses, args = [], []
+        if strategies is not None:
+            if holding_days is None:
+                raise ValueError("holding_days is required when filtering by strategies.")
+            clauses.append("config_key = ?")
+            args.append(config_key(strategies, holding_days, exit_rules))
+        elif holding_days is not None:
+            clauses.append("holding_days = ?")
+            args.append(holding_days)
+        if latest:
+            clauses.append("created = (SELECT MAX(created) FROM results AS newer "
+                           "WHERE newer.symbol = results.symbol AND newer.config_key = results.config_key)")
+        if where:
+            clauses.append(f"({where})")
+            args.extend(params)
+        sql = (f"SELECT symbol, label, holding_days, {', '.join(METRIC_SQL.values())}, error, data_version, "
+               f"created, key FROM results{' WHERE ' + ' AND '.join(clauses) if clauses else ''} "
+               f"ORDER BY cagr DESC")
+        with self.lock:
+            table = pd.read_sql_query(sql, self.connection, params=args)
+        table.columns = ["Symbol", "Strategy", "Holding Days", *METRIC_SQL, "Error", "Data Version", "Created",
+                         "Key"]
+        table["Trades"] = table["Trades"].fillna(0).astype(int)
+        table["Created"] = pd.to_datetime(table["Created"], unit="s")
+        return table
+
+    def trades(self, key):
+        with self.lock:
+            table = pd.read_sql_query(f"SELECT {', '.join(TRADE_SQL.values())} FROM trades WHERE key = ? "
+                                      f"ORDER BY rowid", self.connection, params=(key,))
+        table.columns = TRADE_COLUMNS
+        for column in ("Entry Date", "Exit Date"):
+            table[column] = pd.to_datetime(table[column])
+        return table
+
+    def run_results(self, run_id=None):
+        # Results of one run (default: the latest), with whether each came from the cache
+        with self.lock:
+            if run_id is None:
+                run_id = self.connection.execute("SELECT MAX(run_id) FROM runs").fetchone()[0]
+            table = pd.read_sql_query(
+                f"SELECT run_results.symbol, cached, error, {', '.join(METRIC_SQL.values())} FROM run_results "
+                f"JOIN results USING (key) WHERE run_id = ? ORDER BY cagr DESC", self.connection, params=(run_id,))
+        table.columns = ["Symbol", "Cached", "Error", *METRIC_SQL]
+        table["Cached"] = table["Cached"].astype(bool)
+        table["Trades"] = table["Trades"].fillna(0).astype(int)
+        return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query stored backtest results without re-running anything.")
+    parser.add_argument("--db", default="results.db", help="Result store written by run_strategy.py")
+    parser.add_argument("--strategy", action="append",
+                        help="Strategy name as in strategies.STRATEGIES (repeat to match a combination)")
+    parser.add_argument("--holding-days", type=int, default=5)
+    parser.add_argument("--where", help="SQL filter over result columns, e.g. \"cagr > 16 AND trades >= 20\"")
+    parser.add_argument("--all-versions", action="store_true", help="Include results for older data versions")
+    args = parser.parse_args()
+
+    strategies = None
+    if args.strategy:
+        from strategies import STRATEGIES
+        strategies = [STRATEGIES[name] for name in args.strategy]
+    table = ResultStore(args.db).query(args.where, strategies=strategies, holding_days=args.holding_days,
+                                       latest=not args.all_versions)
+    print(table.drop(columns=["Key", "Data Version"]).to_string(index=False))
@@ -0,0 +1,227 @@
+import argparse
+import logging
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from backtester import backtest_fixed_holding
+from fetch_data_module import fetch_data
+from metrics import trade_metrics
+from sweep import CagrBuckets, generate_strategy_signals
+
+logger = logging.getLogger(__name__)
+
+# Resampling-based confidence intervals for one symbol's trade table (backtest_fixed_holding output).
+# Every method draws a (resamples x length) index matrix per batch and compounds it with numpy, so
+# thousands of resamples cost a handful of array operations; robustness_universe spreads symbols
+# over processes. CAGR and drawdown follow metrics.py (CAGR over the first-entry to last-exit span,
+# drawdown of the equity curve starting at 1, in negative percent).
+
+
+def trade_returns(trades):
+    # Per-trade return on the account (equity before the trade)
+    pnl = trades["PnL"].to_numpy(dtype=np.float64)
+    return pnl / (trades["Equity"].to_numpy(dtype=np.float64) - pnl)
+
+
+def trade_years(trades):
+    return ((trades["Exit Date"].max() - trades["Entry Date"].min()).days) / 365.0
+
+
+def compound(returns, years):
+    # CAGR (%) and max drawdown (%) of every row of a (resamples x steps) return matrix
+    equity = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    max_drawdown = np.minimum((equity / peak - 1).min(axis=1), 0.0) * 100
+    with np.errstate(invalid="ignore"):
+        cagr = (equity[:, -1] ** (1 / years) - 1) * 100 if years > 0 else np.zeros(len(returns))
+    return cagr, max_drawdown
+
+
+def _batches(n_resamples, batch_size):
+    for start in range(0, n_resamples, batch_size):
+        yield min(batch_size, n_resamples - start)
+
+
+def _resample(draw, returns, years, n_resamples, batch_size):
+    # draw(rng_batch_size) -> index matrix into returns; results of every batch are concatenated
+    cagr, drawdown = [], []
+    for size in _batches(n_resamples, batch_size):
+        batch_cagr, batch_drawdown = compound(returns[draw(size)], years)
+        cagr.append(batch_cagr)
+        drawdown.append(batch_drawdown)
+    return np.concatenate(cagr), np.concatenate(drawdown)
+
+
+def shuffle_trades(trades, n_resamples=10000, batch_size=2000, rng=None):
+    # Trade-order permutations: the final equity (and CAGR) is order-invariant, the drawdown path is not
+    rng = rng if rng is not None else np.random.default_rng()
+    returns = trade_returns(trades)
+    n = len(returns)
+    return _resample(lambda size: rng.permuted(np.tile(np.arange(n), (size, 1)), axis=1), returns,
+                     trade_years(trades), n_resamples, batch_size)
+
+
+def bootstrap_trades(trades, n_resamples=10000, batch_size=2000, rng=None):
+    # Trades drawn with replacement: how much of the CAGR a different sample of the same trades keeps
+    rng = rng if rng is not None else np.random.default_rng()
+    returns = trade_returns(trades)
+    n = len(returns)
+    return _resample(lambda size: rng.integers(0, n, (size, n)), returns, trade_years(trades), n_resamples,
+                     batch_size)
+
+
+def daily_returns(trades, data):
+    # Bar-by-bar returns of the marked-to-market account from the first entry to the last exit (flat
+    # between trades); compounded they give exactly the trade table's final equity
+    close = data['Close'].to_numpy(dtype=np.float64)
+    entry = data.index.get_indexer(trades["Entry Date"])
+    exit_ = data.index.get_indexer(trades["Exit Date"])
+    side = np.where(trades["Signal"].to_numpy() == "BUY", 1.0, -1.0)
+    qty = np.round(trades["Capital Deployed"].to_numpy() / trades["Entry Price"].to_numpy())
+
+    # Difference array: each trade holds side x qty shares over bars entry+1 .. exit
+    shares = np.zeros(len(close) + 1)
+    np.add.at(shares, entry + 1, side * qty)
+    np.add.at(shares, exit_ + 1, -side * qty)
+    shares = np.cumsum(shares)[:len(close)]
+
+    start, end = entry.min(), exit_.max()
+    pnl = shares[start + 1:end + 1] * np.diff(close[start:end + 1])
+    initial = trades["Equity"].iloc[0] - trades["PnL"].iloc[0]
+    equity = initial + np.concatenate([[0.0], np.cumsum(pnl)])
+    return pnl / equity[:-1]
+
+
+def block_bootstrap(trades, data, block=20, n_resamples=10000, batch_size=500, rng=None):
+    # Circular block bootstrap of the bar returns; blocks keep the short-range dependence of the series
+    rng = rng if rng is not None else np.random.default_rng()
+    returns = daily_returns(trades, data)
+    n = len(returns)
+    n_blocks = -(-n // block)
+    offsets = np.arange(block)
+    # Wrapped copy, so a block starting near the end continues from the beginning without a modulo
+    wrapped = np.concatenate([returns, np.resize(returns, block)])
+
+    def draw(size):
+        starts = rng.integers(0, n, (size, n_blocks, 1))
+        return (starts + offsets).reshape(size, -1)[:, :n]
+
+    return _resample(draw, wrapped, trade_years(trades), n_resamples, batch_size)
+
+
+def random_entry_null(trades, data, holding_days=5, n_resamples=10000, batch_size=2000, rng=None):
+    # Null baseline: as many trades, with the same long/short mix, entered on random bars of the traded
+    # period and held `holding_days` bars, fully invested. Returns the CAGR and drawdown of every draw.
+    rng = rng if rng is not None else np.random.default_rng()
+    close = data['Close'].to_numpy(dtype=np.float64)
+    first = data.index.get_indexer(trades["Entry Date"]).min()
+    last = data.index.get_indexer(trades["Exit Date"]).max()
+    n_entries = last - holding_days - first + 1
+    if n_entries <= 0:
+        return np.full(n_resamples, np.nan), np.full(n_resamples, np.nan)
+    moves = close[first + holding_days:last + 1] / close[first:first + n_entries] - 1
+    sides = np.where(trades["Signal"].to_numpy() == "BUY", 1.0, -1.0)
+    years = trade_years(trades)
+
+    cagr, drawdown = [], []
+    for size in _batches(n_resamples, batch_size):
+        entries = np.sort(rng.integers(0, n_entries, (size, len(sides))), axis=1)
+        batch_cagr, batch_drawdown = compound(sides * moves[entries], years)
+        cagr.append(batch_cagr)
+        drawdown.append(batch_drawdown)
+    return np.concatenate(cagr), np.concatenate(drawdown)
+
+
+def robustness(trades, data, holding_days=5, n_resamples=10000, block=20, confidence=0.9, seed=0):
+    # One record per symbol: observed CAGR / max drawdown with resampled confidence intervals and the
+    # share of random-entry baselines that did at least as well (a one-sided p-value)
+    if len(trades) == 0:
+        raise ValueError("No trades to resample.")
+    rng = np.random.default_rng(seed)
+    low, high = (1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100
+    observed = trade_metrics(trades)
+
+    boot_cagr, boot_drawdown = bootstrap_trades(trades, n_resamples, rng=rng)
+    _, shuffle_drawdown = shuffle_trades(trades, n_resamples, rng=rng)
+    block_cagr, block_drawdown = block_bootstrap(trades, data, block, n_resamples, rng=rng)
+    null_cagr, _ = random_entry_null(trades, data, holding_days, n_resamples, rng=rng)
+
+    def interval(values):
+        return np.nanpercentile(values, [low, high]) if np.isfinite(values).any() else (np.nan, np.nan)
+
+    record = {"Trades": observed["Trades"], "CAGR (%)": observed["CAGR (%)"],
+              "Max Drawdown (%)": observed["Max Drawdown (%)"]}
+    for name, values in (("Bootstrap CAGR", boot_cagr), ("Bootstrap Max DD", boot_drawdown),
+                         ("Shuffle Max DD", shuffle_drawdown), ("Block CAGR", block_cagr),
+                         ("Block Max DD", block_drawdown)):
+        record[f"{name} Low (%)"], record[f"{name} High (%)"] = interval(values)
+    record["Null CAGR High (%)"] = interval(null_cagr)[1]
+    record["p-value"] = float(np.mean(null_cagr >= observed["CAGR (%)"]))
+    return record
+
+
+def symbol_seed(symbol, seed=0):
+    # Stable per-symbol seed, so results do not depend on worker scheduling
+    return zlib.crc32(symbol.encode()) ^ seed
+
+
+def robustness_symbol(symbol, strategies, holding_days=5, n_resamples=10000, block=20, confidence=0.9, seed=0,
+                      loader=fetch_data):
+    try:
+        data = loader(symbol)
+        trades = backtest_fixed_holding(data, generate_strategy_signals(data, strategies), holding_days)
+        record = robustness(trades, data, holding_days, n_resamples, block, confidence, symbol_seed(symbol, seed))
+    except Exception as e:
+        logger.warning("Error processing %s: %s", symbol, e)
+        return None
+    return {"Symbol": symbol, **record}
+
+
+def robustness_universe(symbols, strategies, holding_days=5, n_resamples=10000, block=20, confidence=0.9, seed=0,
+                        workers=None, loader=fetch_data):
+    # One process per core, each loading, backtesting and resampling whole symbols
+    workers = os.cpu_count() if workers is None else workers
+    run = partial(robustness_symbol, strategies=strategies, holding_days=holding_days, n_resamples=n_resamples,
+                  block=block, confidence=confidence, seed=seed, loader=loader)
+    if workers:
+        with ProcessPoolExecutor(workers) as pool:
+            records = list(pool.map(run, symbols, chunksize=4))
+    else:
+        records = [run(symbol) for symbol in symbols]
+    return pd.DataFrame([record for record in records if record is not None])
+
+
+if __name__ == "__main__":
+    from strategies import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals for CAGR and max drawdown.")
+    parser.add_argument("symbols_csv", help="CSV file with a 'Symbol' column (e.g. nifty50.csv)")
+    parser.add_argument("--strategy", action="append", required=True,
+                        help="Strategy name as in strategies.STRATEGIES (repeat to combine)")
+    parser.add_argument("--holding-days", type=int, default=5)
+    parser.add_argument("--resamples", type=int, default=10000)
+    parser.add_argument("--block", type=int, default=20, help="Block length (bars) for the block bootstrap")
+    parser.add_argument("--confidence", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="Write the per-symbol table to this CSV file")
+    args = parser.parse_args()
+
+    symbols = pd.read_csv(args.symbols_csv, usecols=['Symbol'])['Symbol'].dropna().unique().tolist()
+    table = robustness_universe(symbols, [STRATEGIES[name] for name in args.strategy], args.holding_days,
+                                args.resamples, args.block, args.confidence, args.seed, args.workers)
+    if args.out:
+        table.to_csv(args.out, index=False)
+
+    # Bucket on the lower confidence bound instead of the point CAGR
+    buckets = CagrBuckets()
+    for symbol, cagr in zip(table.get("Symbol", []), table.get("Bootstrap CAGR Low (%)", [])):
+        buckets.add(symbol, cagr)
+    print(f"\n[ROBUST SUMMARY] lower {args.confidence:.0%} bound of bootstrapped CAGR")
+    for line in buckets.summary_lines():
+        print(line)
@@ -1,34 +1,61 @@
+from collections import deque
+
+import numpy as np
 import pandas as pd
+from indicators import rsi, window_mean
 from strategy_base import Strategy
 
 class RSIStrategy(Strategy):
+    param_names = ('period',)
+    # Reversed RSI: short when RSI crosses above 30, cover (buy) when it crosses below 70 (wins on a tie)
+    rules = ((-1, "cross_above(rsi(close, period), 30)"),
+             (1, "cross_below(rsi(close, period), 70)"))
+
     def __init__(self, data: pd.DataFrame, period: int = 14):
         super().__init__(data)
         self.period = period
 
-    def calculate_rsi(self, series: pd.Series):
-        delta = series.diff()
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-
-        avg_gain = gain.rolling(self.period).mean()
-        avg_loss = loss.rolling(self.period).mean()
-
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
-
-    def generate_signals(self):
-        rsi = self.calculate_rsi(self.data['Close'])
-        self.signals['signal'] = 0
-
-        # 🔴 Short when RSI crosses above 30 (was buy)
-        short_condition = (rsi > 30) & (rsi.shift(1) <= 30)
-        self.signals.loc[short_condition, 'signal'] = -1
-
-        # 🟢 Cover (buy) when RSI crosses below 70 (was sell)
-        cover_condition = (rsi < 70) & (rsi.shift(1) >= 70)
-        self.signals.loc[cover_condition, 'signal'] = 1
-
-        print(f"\n📊 Reversed RSI Strategy: {self.signals['signal'].value_counts().to_dict()}")
-        return self.signals
+    def lookback(self):
+        # RSI on the previous bar needs `period` price changes before it
+        return self.period + 1
+
+    @classmethod
+    def generate_panel_signals(cls, panel, period: int = 14):
+        rsi_values = rsi(panel.frame('Close'), period)
+        signals = np.zeros(panel.shape, dtype=np.int8)
+        signals[((rsi_values > 30) & (rsi_values.shift(1) <= 30)).to_numpy()] = -1
+        signals[((rsi_values < 70) & (rsi_values.shift(1) >= 70)).to_numpy()] = 1
+        return signals
+
+    def initial_state(self):
+        return {"prev_close": None, "gains": deque(maxlen=self.period), "losses": deque(maxlen=self.period),
+                "rsi": None}
+
+    def update(self, bar):
+        state = self.state
+        close, prev_close = bar['Close'], state["prev_close"]
+        state["prev_close"] = close
+        if prev_close is None:
+            return 0
+        delta = close - prev_close
+        state["gains"].append(max(delta, 0.0))
+        state["losses"].append(max(-delta, 0.0))
+
+        avg_gain = window_mean(state["gains"], self.period)
+        avg_loss = window_mean(state["losses"], self.period)
+        prev_rsi = state["rsi"]
+        if avg_gain is None or (avg_gain == 0 and avg_loss == 0):
+            rsi_value = None
+        elif avg_loss == 0:
+            rsi_value = 100.0
+        else:
+            rsi_value = 100 - (100 / (1 + avg_gain / avg_loss))
+        state["rsi"] = rsi_value
+
+        if rsi_value is None or prev_rsi is None:
+            return 0
+        if rsi_value < 70 and prev_rsi >= 70:
+            return 1
+        if rsi_value > 30 and prev_rsi <= 30:
+            return -1
+        return 0
@@ -1,32 +1,56 @@
-from breakout_52w import Breakout52Week
-from ma_crossover import MovingAverageCrossover
-from rsi_strategy import RSIStrategy
-from volume_spike import VolumeSpikeStrategy
-from macd_strategy import MACDStrategy
 from backtester import backtest_fixed_holding, summarize_results
-import yfinance as yf
+from bulk_loader import BulkLoader
+from exit_rules import backtest_exit_rules
+from fetch_data_module import data_stamp, fetch_data
+from instrumentation import Instrumentation
+from intraday import run_chunked_sweep
+from panel import run_panel_sweep
+from result_store import ResultStore
+from screener import screen_universe
+from strategies import STRATEGIES, STRATEGY_NAMES
+from sweep import CagrBuckets, generate_strategy_signals, run_sweep
+from universe_store import open_universe_store
+from functools import partial
+import argparse
+import logging
 import pandas as pd
 
-
-def fetch_data(symbol='RELIANCE.NS', start='2020-06-01', end='2025-06-01'):
-    df = yf.download(symbol, start=start, end=end, interval='1d', group_by='ticker')
-    if isinstance(df.columns, pd.MultiIndex):
-        df = df.droplevel(0, axis=1)
-    df = df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
-    df.index.name = 'Date'
-    return df
-
-
-def combine_signals(*signals_list):
-    combined = signals_list[0].copy()
-    combined['signal'] = 0
-    for signals in signals_list:
-        combined['signal'] += signals['signal']
-    combined['signal'] = combined['signal'].clip(lower=-1, upper=1)
-    return combined
-
-
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run strategy backtests over a stock universe.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes for signal generation/backtests (default: CPU count, 0 = inline)")
+    parser.add_argument("--io-workers", type=int, default=8, help="Threads used to load market data")
+    parser.add_argument("--panel", action="store_true",
+                        help="Run batch mode as one (dates x symbols) panel instead of symbol by symbol")
+    parser.add_argument("--store", help="Read bars from a memory-mapped universe store (see universe_store.py)")
+    parser.add_argument("--prefetch", action="store_true",
+                        help="Bulk-download missing bars for the whole universe (batched, rate-limited) first")
+    parser.add_argument("--verbose", action="store_true", help="Log per-symbol strategy and performance details")
+    parser.add_argument("--report", help="Write a JSON run report (stage p50/p95, counters, slowest symbols)")
+    parser.add_argument("--profile-symbol", help="Run this symbol under cProfile (writes profile_<symbol>.prof)")
+    parser.add_argument("--results", default="results.db",
+                        help="SQLite result store; unchanged (data, strategy, params) results are reused from it")
+    parser.add_argument("--no-results", action="store_true", help="Neither reuse nor store batch results")
+    parser.add_argument("--screen",
+                        help="Only backtest symbols passing this SQL filter over the screener index, e.g. "
+                             "\"bars >= 252 AND turnover > 1e7 AND signals > 0\" (see screener.py)")
+    parser.add_argument("--screener", default="screener.db",
+                        help="Screener index, updated incrementally before screening (one per bar interval)")
+    parser.add_argument("--interval", default="1d",
+                        help="Bar interval, e.g. 1d, 1h, 5m or 1m (the holding period is counted in bars)")
+    parser.add_argument("--chunk-rows", type=int,
+                        help="Stream each symbol's bars in chunks of this many rows (bounded memory for intraday)")
+    parser.add_argument("--stop-loss", type=float, help="Stop-loss in percent of the entry price")
+    parser.add_argument("--take-profit", type=float, help="Take-profit in percent of the entry price")
+    parser.add_argument("--trailing-stop", type=float, help="Trailing stop in percent off the best price")
+    parser.add_argument("--atr-stop", type=float, help="Stop at this multiple of the 14-bar ATR below/above entry")
+    args = parser.parse_args()
+    # Any exit rule switches batch runs to the path-dependent engine (exit_rules.py); holding_days stays the cap
+    exit_rules = {name: value for name, value in (("stop_loss_pct", args.stop_loss),
+                                                   ("take_profit_pct", args.take_profit),
+                                                   ("trailing_stop_pct", args.trailing_stop),
+                                                   ("atr_stop", args.atr_stop)) if value is not None}
+
     print("\n[Step 1] Choose dataset to run the strategy on:")
     print("1. NIFTY 50")
     print("2. NIFTY Midcap 100")
@@ -70,105 +94,127 @@ if __name__ == "__main__":
         print("[Error] Invalid dataset choice.")
         exit()
 
+    # Per-symbol details are quiet in batch runs unless --verbose is given
+    logging.basicConfig(format="%(message)s",
+                        level=logging.INFO if args.verbose or not batch_mode else logging.WARNING)
+
     print("\n[Step 2] Select strategy:")
-    print("1. 52-Week High Breakout")
-    print("2. Moving Average Crossover")
-    print("3. RSI Strategy")
-    print("4. Volume Spike Strategy")
-    print("5. MACD Strategy")
-    print("6. Combine Multiple Strategies")
-
-    strategy_choice = input("Enter strategy choice (1 to 6): ").strip()
+    combine_choice = str(len(STRATEGY_NAMES) + 1)
+    for number, name in enumerate(STRATEGY_NAMES, 1):
+        print(f"{number}. {name}")
+    print(f"{combine_choice}. Combine Multiple Strategies")
+
+    strategy_choice = input(f"Enter strategy choice (1 to {combine_choice}): ").strip()
     selected_strategies = []
+    valid_choices = [str(number) for number in range(1, len(STRATEGY_NAMES) + 1)]
 
-    if strategy_choice == "6":
+    if strategy_choice == combine_choice:
         print("\n[Step 2.1] Choose strategies to combine (e.g., 1 3 5 for Breakout, RSI, MACD):")
-        print("1. 52-Week High Breakout")
-        print("2. Moving Average Crossover")
-        print("3. RSI Strategy")
-        print("4. Volume Spike Strategy")
-        print("5. MACD Strategy")
+        for number, name in enumerate(STRATEGY_NAMES, 1):
+            print(f"{number}. {name}")
         selected_strategies = input("Enter choices (space-separated): ").strip().split()
 
-    positive_cagr = 0
-    above_12_cagr = 0
-    above_16_cagr = 0
-    above_20_cagr = 0
-    negative_cagr = 0
-    top_12_names = []
-    top_16_names = []
-    top_20_names = []
+    if strategy_choice in valid_choices:
+        strategies = [STRATEGIES[STRATEGY_NAMES[int(strategy_choice) - 1]]]
+    elif strategy_choice == combine_choice:
+        strategies = [STRATEGIES[STRATEGY_NAMES[int(num) - 1]] for num in selected_strategies if num in valid_choices]
+    else:
+        print("[Error] Invalid strategy choice.")
+        exit()
 
-    for symbol in symbols:
-        try:
-            print(f"\n[INFO] Fetching data for {symbol}...")
-            data = fetch_data(symbol)
-
-            if strategy_choice == "1":
-                strategy = Breakout52Week(data)
-                signals = strategy.generate_signals()
-            elif strategy_choice == "2":
-                strategy = MovingAverageCrossover(data, short_window=50, long_window=200)
-                signals = strategy.generate_signals()
-            elif strategy_choice == "3":
-                strategy = RSIStrategy(data)
-                signals = strategy.generate_signals()
-            elif strategy_choice == "4":
-                strategy = VolumeSpikeStrategy(data)
-                signals = strategy.generate_signals()
-            elif strategy_choice == "5":
-                strategy = MACDStrategy(data)
-                signals = strategy.generate_signals()
-            elif strategy_choice == "6":
-                signals_list = []
-                for num in selected_strategies:
-                    if num == "1":
-                        s = Breakout52Week(data).generate_signals()
-                    elif num == "2":
-                        s = MovingAverageCrossover(data, 50, 200).generate_signals()
-                    elif num == "3":
-                        s = RSIStrategy(data).generate_signals()
-                    elif num == "4":
-                        s = VolumeSpikeStrategy(data).generate_signals()
-                    elif num == "5":
-                        s = MACDStrategy(data).generate_signals()
-                    else:
-                        continue
-                    signals_list.append(s)
-                signals = combine_signals(*signals_list)
-            else:
-                print("[Error] Invalid strategy choice.")
+    if batch_mode and args.screen:
+        # Cheap, incrementally maintained features decide which symbols enter the full pipeline
+        if args.store:
+            screen_loader = open_universe_store(args.store)
+            screen_stamp = screen_loader.stamp
+        else:
+            screen_loader = partial(fetch_data, interval=args.interval)
+            screen_stamp = partial(data_stamp, interval=args.interval)
+        screened, failed = screen_universe(symbols, args.screen, strategies=strategies, loader=screen_loader,
+                                           path=args.screener, io_workers=args.io_workers, stamp=screen_stamp)
+        for symbol, error in failed.items():
+            print(f"[WARNING] Error screening {symbol}: {error}")
+        print(f"[INFO] Screener kept {len(screened)} of {len(symbols)} symbols")
+        symbols = screened
+
+    if batch_mode and args.panel:
+        if exit_rules:
+            print("[WARNING] Exit rules are not supported in panel mode; using fixed holding periods.")
+        buckets = CagrBuckets()
+        results, failed = run_panel_sweep(symbols, strategies, holding_days=5,
+                                          loader=partial(fetch_data, interval=args.interval))
+        for symbol, error in failed.items():
+            print(f"[WARNING] Error processing {symbol}: {error}")
+        for symbol, trades, cagr in zip(results["Symbol"], results["Trades"], results["CAGR (%)"]):
+            if trades == 0:
+                print(f"[WARNING] Error processing {symbol}: no trades")
                 continue
+            buckets.add(symbol, cagr)
 
-            print(f"[INFO] Running strategy on {symbol}")
-            results = backtest_fixed_holding(data, signals, holding_days=5)
-            cagr = summarize_results(results)
-
-            if batch_mode:
-                if cagr > 0:
-                    positive_cagr += 1
-                    if cagr > 12:
-                        above_12_cagr += 1
-                        top_12_names.append(symbol)
-                    if cagr > 16:
-                        above_16_cagr += 1
-                        top_16_names.append(symbol)
-                    if cagr > 20:
-                        above_20_cagr += 1
-                        top_20_names.append(symbol)
+        print("\n[BATCH SUMMARY]")
+        for line in buckets.summary_lines():
+            print(line)
+    elif batch_mode and args.chunk_rows:
+        if exit_rules:
+            print("[WARNING] Exit rules are not supported in chunked mode; using fixed holding periods.")
+        buckets = CagrBuckets()
+        for result in run_chunked_sweep(symbols, strategies, holding_days=5, interval=args.interval,
+                                        chunk_rows=args.chunk_rows, workers=args.workers):
+            if result.error is not None:
+                print(f"[WARNING] Error processing {result.symbol}: {result.error}")
+                continue
+            print(f"[INFO] {result.symbol} → CAGR: {result.cagr:.2f}%")
+            buckets.add(result.symbol, result.cagr)
+
+        print("\n[BATCH SUMMARY]")
+        for line in buckets.summary_lines():
+            print(line)
+    elif batch_mode:
+        if args.prefetch and not args.store:
+            report = BulkLoader().load(symbols, interval=args.interval)
+            print(f"[INFO] Prefetched {len(report['loaded'])} symbols, {len(report['failed'])} failed")
+
+        buckets = CagrBuckets()
+        instrumentation = Instrumentation()
+        loader = open_universe_store(args.store) if args.store else partial(fetch_data, interval=args.interval)
+        result_store = None if args.no_results else ResultStore(args.results)
+        for result in run_sweep(symbols, strategies, holding_days=5, workers=args.workers,
+                                io_workers=args.io_workers, loader=loader, load_in_worker=bool(args.store),
+                                instrumentation=instrumentation, profile_symbol=args.profile_symbol,
+                                result_store=result_store, exit_rules=exit_rules or None):
+            if result.error is not None:
+                print(f"[WARNING] Error processing {result.symbol}: {result.error}")
+                continue
+            print(f"[INFO] {result.symbol} → CAGR: {result.cagr:.2f}%{' (cached)' if result.cached else ''}")
+            buckets.add(result.symbol, result.cagr)
+
+        print("\n[BATCH SUMMARY]")
+        for line in buckets.summary_lines():
+            print(line)
+
+        print("\n[RUN REPORT]")
+        for line in instrumentation.summary_lines():
+            print(line)
+        if args.report:
+            instrumentation.to_json(args.report)
+            print(f"[INFO] Run report written to {args.report}")
+    else:
+        for symbol in symbols:
+            try:
+                print(f"\n[INFO] Fetching data for {symbol}...")
+                data = fetch_data(symbol, interval=args.interval)
+                signals = generate_strategy_signals(data, strategies)
+                print(f"📊 Signals: {signals['signal'].value_counts().to_dict()}")
+
+                print(f"[INFO] Running strategy on {symbol}")
+                if exit_rules:
+                    results = backtest_exit_rules(data, signals, holding_days=5, **exit_rules)
                 else:
-                    negative_cagr += 1
-            else:
+                    results = backtest_fixed_holding(data, signals, holding_days=5)
+                summarize_results(results)
+
                 from backtester import plot_trades
                 plot_trades(data, results, symbol)
 
-        except Exception as e:
-            print(f"[WARNING] Error processing {symbol}: {e}")
-
-    if batch_mode:
-        print("\n[BATCH SUMMARY]")
-        print(f"Positive CAGR Stocks: {positive_cagr}")
-        print(f"Negative CAGR Stocks: {negative_cagr}")
-        print(f"CAGR > 12%: {above_12_cagr} → {top_12_names}")
-        print(f"CAGR > 16%: {above_16_cagr} → {top_16_names}")
-        print(f"CAGR > 20%: {above_20_cagr} → {top_20_names}")
+            except Exception as e:
+                print(f"[WARNING] Error processing {symbol}: {e}")
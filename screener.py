@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from fetch_data_module import data_stamp, fetch_data
+from result_store import data_version, strategy_config
+from sweep import strategy_signals
+
+# Screener index: cheap per-symbol features kept in SQLite so a universe run can drop symbols that cannot produce
+# a meaningful result (short history, thin turnover, no recent signals) before the fetch -> signal -> backtest
+# pipeline. Rows are keyed by data_version, so update() only recomputes symbols whose bars changed (or whose
+# strategy rules, parameters or signal window changed, for the signal counts). Given a `stamp` (a cheap version
+# read from the cache metadata, e.g. fetch_data_module.data_stamp), unchanged symbols are not even loaded.
+
+TURNOVER_WINDOW = 20  # bars averaged for turnover (Close x Volume)
+HIGH_WINDOW = 252  # bars in the 52-week high
+SIGNAL_WINDOW = 252  # signal counts cover the last this many bars
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    symbol TEXT PRIMARY KEY,
+    data_version TEXT NOT NULL,
+    updated REAL NOT NULL,
+    last_date TEXT,
+    bars INTEGER NOT NULL,
+    turnover REAL,
+    high_52w_distance REAL
+);
+CREATE INDEX IF NOT EXISTS features_bars ON features (bars, turnover);
+CREATE TABLE IF NOT EXISTS signal_counts (
+    symbol TEXT NOT NULL,
+    strategy_key TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    signals INTEGER NOT NULL,
+    PRIMARY KEY (symbol, strategy_key)
+);
+"""
+
+
+def strategy_key(cls, params, window=SIGNAL_WINDOW):
+    # Hash of one strategy's class, full parameters, rules and the counting window
+    payload = json.dumps([strategy_config([(cls, params)]), [list(rule) for rule in cls.rules], window],
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def symbol_features(data):
+    # history length, last bar date, average turnover, and % of the last close below the 52-week closing high
+    close = data['Close'].to_numpy(dtype=np.float64)
+    if not len(close):
+        return {"last_date": None, "bars": 0, "turnover": None, "high_52w_distance": None}
+    turnover = close[-TURNOVER_WINDOW:] * data['Volume'].to_numpy(dtype=np.float64)[-TURNOVER_WINDOW:]
+    return {
+        "last_date": str(data.index[-1]),
+        "bars": len(close),
+        "turnover": float(turnover.mean()),
+        "high_52w_distance": float((close[-1] / close[-HIGH_WINDOW:].max() - 1) * 100),
+    }
+
+
+def signal_counts(data, strategies, window=SIGNAL_WINDOW):
+    # Non-zero signals of each strategy over the last `window` bars
+    return [int(np.count_nonzero(signal[-window:])) for signal in strategy_signals(data, strategies)]
+
+
+class ScreenerIndex:
+    def __init__(self, path="screener.db", signal_window=SIGNAL_WINDOW):
+        self.path = os.path.abspath(path)
+        self.signal_window = signal_window
+        self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+
+    def versions(self):
+        # {symbol: data_version} of the features, and {(symbol, strategy_key): data_version} of the counts
+        with self.lock:
+            features = dict(self.connection.execute("SELECT symbol, data_version FROM features"))
+            counts = {(symbol, key): version for symbol, key, version in
+                      self.connection.execute("SELECT symbol, strategy_key, data_version FROM signal_counts")}
+        return features, counts
+
+    def _compute(self, symbol, loader, strategies, keys, features, counts, stamp=None):
+        def stale_keys(version):
+            return [i for i, key in enumerate(keys) if counts.get((symbol, key)) != version]
+
+        version = stamp(symbol) if stamp is not None else None
+        if version is not None and features.get(symbol) == version and not stale_keys(version):
+            return None
+        data = loader(symbol)
+        # The stamp again after loading, which may have downloaded new bars; the content hash if there is none
+        version = (stamp(symbol) if stamp is not None else None) or data_version(data)
+        stale = stale_keys(version)
+        if features.get(symbol) == version and not stale:
+            return None
+        found = symbol_features(data)
+        found_counts = signal_counts(data, [strategies[i] for i in stale], self.signal_window) if stale else []
+        return version, found, [(keys[i], count) for i, count in zip(stale, found_counts)]
+
+    def update(self, symbols, loader=fetch_data, strategies=(), io_workers=8, stamp=None):
+        # Brings the index up to date for `symbols`: loads each one (from the local cache, normally) and recomputes
+        # features and signal counts only where the data or the strategy changed. With a stamp(symbol) callable,
+        # symbols whose stamp matches the index are skipped without loading. Returns {symbol: error}.
+        keys = [strategy_key(cls, params, self.signal_window) for cls, params in strategies]
+        features, counts = self.versions()
+        failed = {}
+        with ThreadPoolExecutor(max_workers=max(1, io_workers)) as pool:
+            futures = {pool.submit(self._compute, symbol, loader, list(strategies), keys, features, counts,
+                                   stamp): symbol
+                       for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    found = future.result()
+                except Exception as e:
+                    failed[symbol] = str(e)
+                    continue
+                if found is not None:
+                    self.put(symbol, *found)
+        return failed
+
+    def put(self, symbol, version, features, counts):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO features (symbol, data_version, updated, last_date, bars, turnover, "
+                "high_52w_distance) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (symbol, version, time.time(), features["last_date"], features["bars"], features["turnover"],
+                 features["high_52w_distance"]))
+            self.connection.executemany("INSERT OR REPLACE INTO signal_counts VALUES (?, ?, ?, ?)",
+                                        [(symbol, key, version, count) for key, count in counts])
+
+    def screen(self, where=None, params=(), strategies=None, symbols=None):
+        # e.g. screen("bars >= 252 AND turnover > ? AND signals > 0", (1e7,), strategies=[(MACDStrategy, {})]).
+        # `where` is SQL over bars, turnover, high_52w_distance, last_date and signals: the summed signal counts
+        # of `strategies` for the current data (NULL if they were never indexed). Rows are limited to `symbols`.
+        keys = [strategy_key(cls, p, self.signal_window) for cls, p in strategies or ()]
+        sql = ("SELECT f.symbol, f.bars, f.last_date, f.turnover, f.high_52w_distance, s.signals FROM features AS f "
+               "LEFT JOIN (SELECT c.symbol, SUM(c.signals) AS signals, COUNT(*) AS counted FROM signal_counts AS c "
+               "JOIN features AS v ON v.symbol = c.symbol AND v.data_version = c.data_version "
+               f"WHERE c.strategy_key IN ({', '.join('?' * len(keys))}) GROUP BY c.symbol) AS s "
+               f"ON s.symbol = f.symbol AND s.counted = {len(keys)}")
+        sql = f"SELECT * FROM ({sql}){' WHERE ' + where if where else ''} ORDER BY symbol"
+        with self.lock:
+            table = pd.read_sql_query(sql, self.connection, params=[*keys, *params])
+        table.columns = ["Symbol", "Bars", "Last Date", "Turnover", "52W High Distance (%)", "Signals"]
+        if symbols is not None:
+            table = table[table["Symbol"].isin(symbols)].reset_index(drop=True)
+        return table
+
+
+def screen_universe(symbols, where, params=(), strategies=(), loader=fetch_data, path="screener.db", io_workers=8,
+                    stamp=None):
+    # Updates the index for `symbols` and returns those passing `where`, in their original order, and
+    # {symbol: error} for symbols that could not be indexed
+    index = ScreenerIndex(path)
+    failed = index.update(symbols, loader, strategies, io_workers, stamp)
+    passed = set(index.screen(where, params, strategies, symbols)["Symbol"])
+    return [symbol for symbol in symbols if symbol in passed], failed
+
+
+if __name__ == "__main__":
+    from strategies import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Build or query the per-symbol screener index.")
+    parser.add_argument("symbols_csv", help="CSV file with a 'Symbol' column (e.g. all_nse_equity_symbols.csv)")
+    parser.add_argument("--db", default="screener.db")
+    parser.add_argument("--strategy", action="append", default=[],
+                        help="Strategy name as in strategies.STRATEGIES whose signals are counted (repeat to sum)")
+    parser.add_argument("--where", help="SQL filter, e.g. \"bars >= 252 AND turnover > 1e7 AND signals > 0\"")
+    parser.add_argument("--no-update", action="store_true", help="Query the index as it is, without loading data")
+    parser.add_argument("--io-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    symbols = pd.read_csv(args.symbols_csv, usecols=['Symbol'])['Symbol'].dropna().unique().tolist()
+    strategies = [STRATEGIES[name] for name in args.strategy]
+    index = ScreenerIndex(args.db)
+    if not args.no_update:
+        for symbol, error in index.update(symbols, strategies=strategies, io_workers=args.io_workers,
+                                          stamp=data_stamp).items():
+            print(f"[WARNING] Error indexing {symbol}: {error}")
+    table = index.screen(args.where, strategies=strategies, symbols=symbols)
+    print(table.to_string(index=False))
+    print(f"\n{len(table)} of {len(symbols)} symbols pass")
@@ -0,0 +1,17 @@
+from breakout_52w import Breakout52Week
+from ma_crossover import MovingAverageCrossover
+from macd_strategy import MACDStrategy
+from rsi_strategy import RSIStrategy
+from volume_spike import VolumeSpikeStrategy
+
+# Strategy registry: the CLI, dashboard and batch menus are built from it, numbered in this order. A new strategy is
+# a Strategy subclass declaring its expression rules (see expr.py) plus one entry here. Kept free of the data,
+# sweep and storage layers so live updates and worker processes can import it cheaply.
+STRATEGIES = {
+    "52-Week High Breakout": (Breakout52Week, {}),
+    "Moving Average Crossover": (MovingAverageCrossover, {"short_window": 50, "long_window": 200}),
+    "RSI Strategy": (RSIStrategy, {}),
+    "Volume Spike Strategy": (VolumeSpikeStrategy, {}),
+    "MACD Strategy": (MACDStrategy, {}),
+}
+STRATEGY_NAMES = list(STRATEGIES)
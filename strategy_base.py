@@ -1,10 +1,91 @@
+import logging
+from collections import deque
+
+import numpy as np
 import pandas as pd
+from expr import evaluate_strategies
+
+logger = logging.getLogger(__name__)
 
 class Strategy:
+    param_names = ()  # constructor parameters, used to rebuild a strategy from saved streaming state
+    rules = ()  # ((signal value, expression), ...) evaluated by expr.py; later rules win where several hold
+
     def __init__(self, data: pd.DataFrame):
-        self.data = data.copy()
+        self.data = data  # Strategies only read the data, so it is shared rather than copied
         self.signals = pd.DataFrame(index=data.index)
         self.signals["signal"] = 0  # 1 = Buy, -1 = Sell, 0 = Hold/Do nothing
 
     def generate_signals(self):
-        raise NotImplementedError("You must implement the generate_signals() method.")
+        # Strategies declare rules, or override this
+        if not self.rules:
+            raise NotImplementedError("You must define rules or implement the generate_signals() method.")
+        self.signals['signal'] = evaluate_strategies(self.data, [(type(self), self.params())])[0]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📊 %s: %s", type(self).__name__, self.signals['signal'].value_counts().to_dict())
+        return self.signals
+
+    @classmethod
+    def generate_panel_signals(cls, panel, **params):
+        # Panel mode: same rule applied to every symbol of a panel.Panel at once,
+        # returning an int8 (dates x symbols) signal array
+        raise NotImplementedError(f"{cls.__name__} does not support panel mode.")
+
+    # Streaming mode: subclasses keep O(window) state in self.state and update(bar) returns the signal
+    # for one new bar (a mapping with 'Close'/'Volume'), matching generate_signals() on the full history.
+    def initial_state(self):
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming mode.")
+
+    def update(self, bar):
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming mode.")
+
+    def params(self):
+        return {name: getattr(self, name) for name in self.param_names}
+
+    # Chunked (out-of-core) mode: chunk_signals(chunk, carry) returns the signals for the next chunk of one
+    # history and the carry to pass along with the following chunk (None for the first). Concatenated, the
+    # chunk signals match generate_signals() on the whole history. By default the carry is the last
+    # lookback() bars, recomputed together with the chunk; EWM strategies carry their EWM values instead.
+    def lookback(self):
+        raise NotImplementedError(f"{type(self).__name__} does not support chunked mode.")
+
+    @classmethod
+    def chunk_signals(cls, chunk, carry=None, **params):
+        data = chunk if carry is None else pd.concat([carry, chunk])
+        strategy = cls(data, **params)
+        signals = strategy.generate_signals().iloc[len(data) - len(chunk):]
+        return signals, data.iloc[len(data) - min(strategy.lookback(), len(data)):]
+
+    def warm_up(self):
+        # Builds the streaming state by replaying self.data; returns the streamed signals
+        self.state = self.initial_state()
+        signals = [self.update({'Close': close, 'Volume': volume})
+                   for close, volume in zip(self.data['Close'].tolist(), self.data['Volume'].tolist())]
+        return pd.Series(signals, index=self.data.index, name='signal')
+
+    def get_state(self):
+        # JSON-serialisable snapshot: deques become lists
+        state = {key: list(value) if isinstance(value, deque) else value for key, value in self.state.items()}
+        return {"strategy": type(self).__name__, "params": self.params(), "state": state}
+
+    @classmethod
+    def from_state(cls, saved):
+        # Skip __init__: a streaming strategy needs its parameters and state, not a history frame
+        strategy = cls.__new__(cls)
+        for name, value in saved["params"].items():
+            setattr(strategy, name, value)
+        state = strategy.initial_state()
+        for key, value in saved["state"].items():
+            if isinstance(state[key], deque):
+                value = deque((tuple(v) if isinstance(v, list) else v for v in value), maxlen=state[key].maxlen)
+            state[key] = value
+        strategy.state = state
+        return strategy
+
+
+def combine_signals(*signals_list):
+    total = signals_list[0]['signal'].to_numpy().copy()
+    for signals in signals_list[1:]:
+        total += signals['signal'].to_numpy()
+    np.clip(total, -1, 1, out=total)
+    return pd.DataFrame({'signal': total}, index=signals_list[0].index)
@@ -0,0 +1,327 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from backtester import backtest_fixed_holding, log_summary
+from exit_rules import backtest_exit_rules
+from expr import evaluate_strategies
+from fetch_data_module import fetch_data
+from instrumentation import StageTimer, profile_to
+from metrics import trade_metrics
+from result_store import config_key, data_version, result_key
+from strategy_base import combine_signals
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SymbolResult:
+    symbol: str
+    cagr: float = None
+    trades: int = 0
+    error: str = None
+    timings: dict = field(default_factory=dict)  # stage -> seconds
+    counters: dict = field(default_factory=dict)  # e.g. bytes_loaded, signals, trades
+    metrics: dict = field(default_factory=dict)  # metrics.trade_metrics record
+    key: str = None  # result_store key, when a store is used
+    cached: bool = False
+
+
+class CagrBuckets:
+    def __init__(self):
+        self.positive_cagr = 0
+        self.negative_cagr = 0
+        self.top_12_names = []
+        self.top_16_names = []
+        self.top_20_names = []
+
+    def add(self, symbol, cagr):
+        if cagr > 0:
+            self.positive_cagr += 1
+            if cagr > 12:
+                self.top_12_names.append(symbol)
+            if cagr > 16:
+                self.top_16_names.append(symbol)
+            if cagr > 20:
+                self.top_20_names.append(symbol)
+        else:
+            self.negative_cagr += 1
+
+    def summary_lines(self):
+        return [
+            f"Positive CAGR Stocks: {self.positive_cagr}",
+            f"Negative CAGR Stocks: {self.negative_cagr}",
+            f"CAGR > 12%: {len(self.top_12_names)} → {self.top_12_names}",
+            f"CAGR > 16%: {len(self.top_16_names)} → {self.top_16_names}",
+            f"CAGR > 20%: {len(self.top_20_names)} → {self.top_20_names}",
+        ]
+
+
+def strategy_signals(data, strategies):
+    # One signal array per (strategy class, constructor kwargs). Rule-based strategies are compiled together into
+    # one graph, so indicators they share are computed once.
+    shared = iter(evaluate_strategies(data, [(cls, params) for cls, params in strategies if cls.rules]))
+    return [next(shared) if cls.rules
+            else cls(data, **params).generate_signals()['signal'].to_numpy()
+            for cls, params in strategies]
+
+
+def generate_strategy_signals(data, strategies):
+    # strategies: list of (strategy class, constructor kwargs); more than one is combined
+    if not strategies:
+        raise ValueError("No strategies selected.")
+    signals_list = [pd.DataFrame({'signal': signal}, index=data.index) for signal in strategy_signals(data, strategies)]
+    if len(signals_list) == 1:
+        return signals_list[0]
+    return combine_signals(*signals_list)
+
+
+def cached_result(symbol, key, result_store):
+    cached = result_store.get(key)
+    if cached is None:
+        return None
+    metrics, error = cached
+    return SymbolResult(symbol, cagr=None if error else metrics["CAGR (%)"], trades=metrics["Trades"], error=error,
+                        metrics=metrics, key=key, cached=True)
+
+
+def evaluate_symbol(symbol, data, strategies, holding_days=5, profile_path=None, result_store=None,
+                    exit_rules=None, version=None, key=None):
+    # version/key: passed by a caller that already hashed the data and found no stored result for the key
+    timer = StageTimer()
+    timer.count("bytes_loaded", int(data.memory_usage().sum()))
+    if result_store is not None and key is None:
+        # Reuse the stored result when neither the bars nor the configuration changed
+        with timer.stage("cache"):
+            version = data_version(data)
+            key = result_key(version, config_key(strategies, holding_days, exit_rules))
+            cached = cached_result(symbol, key, result_store)
+        if cached is not None:
+            cached.timings, cached.counters = timer.timings, timer.counters
+            return cached
+
+    results = None
+    try:
+        with profile_to(profile_path) if profile_path else nullcontext():
+            with timer.stage("signals"):
+                signals = generate_strategy_signals(data, strategies)
+            timer.count("signals", int((signals['signal'] != 0).sum()))
+            timer.count("buy_signals", int((signals['signal'] == 1).sum()))
+            timer.count("sell_signals", int((signals['signal'] == -1).sum()))
+            with timer.stage("backtest"):
+                # exit_rules: backtest_exit_rules keyword arguments (stop_loss_pct, trailing_stop_pct, ...)
+                if exit_rules:
+                    results = backtest_exit_rules(data, signals, holding_days, **exit_rules)
+                else:
+                    results = backtest_fixed_holding(data, signals, holding_days=holding_days)
+            timer.count("trades", len(results))
+            if results.empty:
+                raise ValueError("No trades to summarize.")
+            with timer.stage("summarize"):
+                metrics = trade_metrics(results)
+        result = SymbolResult(symbol, cagr=metrics["CAGR (%)"], trades=len(results), timings=timer.timings,
+                              counters=timer.counters, metrics=metrics, key=key)
+    except Exception as e:
+        result = SymbolResult(symbol, error=str(e), timings=timer.timings, counters=timer.counters, key=key)
+    # Only completed backtests are stored (with or without trades); failures before that are retried
+    if result_store is not None and results is not None:
+        result_store.put(key, symbol, version, strategies, holding_days, result.metrics, results, result.error,
+                         exit_rules)
+    return result
+
+
+def timed_load(loader, symbol):
+    started = time.perf_counter()
+    data = loader(symbol)
+    return data, time.perf_counter() - started
+
+
+def load_and_evaluate(symbol, loader, strategies, holding_days=5, profile_path=None, result_store=None,
+                      exit_rules=None):
+    try:
+        data, load_time = timed_load(loader, symbol)
+    except Exception as e:
+        return SymbolResult(symbol, error=str(e))
+    result = evaluate_symbol(symbol, data, strategies, holding_days, profile_path, result_store, exit_rules)
+    result.timings["load"] = load_time
+    return result
+
+
+# Loads data on a thread pool and runs signals + backtest on a process pool, yielding each
+# SymbolResult as soon as it finishes (completion order). workers=0 runs everything inline.
+# load_in_worker=True skips the thread pool and has each worker call the (picklable) loader itself,
+# e.g. a memory-mapped UniverseStore, so frames are never pickled across processes.
+# Stage timings and counters of every result are fed to `instrumentation` when one is given, and
+# `profile_symbol` is run under cProfile with the stats written to profile_<symbol>.prof.
+# With a result_store.ResultStore, symbols whose data and configuration are unchanged are served from
+# the store, new results are written to it, and the sweep is recorded there as a run.
+# exit_rules switches the backtest to exit_rules.backtest_exit_rules with those keyword arguments.
+def run_sweep(symbols, strategies, holding_days=5, workers=None, io_workers=8, loader=fetch_data,
+              load_in_worker=False, instrumentation=None, profile_symbol=None, result_store=None, exit_rules=None):
+    run_id = result_store.start_run(strategies, holding_days, exit_rules) if result_store is not None else None
+
+    def finish(result):
+        # Per-symbol details are logged here, in the parent, so they also appear for results from worker processes
+        if result.error is None and logger.isEnabledFor(logging.INFO):
+            if "buy_signals" in result.counters:
+                logger.info("📊 %s signals: %d buys, %d sells", result.symbol, result.counters["buy_signals"],
+                            result.counters["sell_signals"])
+            log_summary(result.metrics, label=f" ({result.symbol})")
+        if instrumentation is not None:
+            instrumentation.record(result.symbol, result.timings, result.counters)
+            instrumentation.count("errors" if result.error is not None else "symbols")
+            if result.cached:
+                instrumentation.count("cached")
+        if run_id is not None and result.key is not None:
+            result_store.add_to_run(run_id, result.symbol, result.key, result.cached)
+        return result
+
+    def profile_path(symbol):
+        return f"profile_{symbol}.prof" if symbol == profile_symbol else None
+
+    if workers == 0:
+        for symbol in symbols:
+            yield finish(load_and_evaluate(symbol, loader, strategies, holding_days, profile_path(symbol),
+                                           result_store, exit_rules))
+        return
+
+    workers = workers or os.cpu_count() or 1
+    if load_in_worker:
+        with ProcessPoolExecutor(workers) as cpu_pool:
+            futures = {cpu_pool.submit(load_and_evaluate, symbol, loader, strategies, holding_days,
+                                       profile_path(symbol), result_store, exit_rules): symbol
+                       for symbol in symbols}
+            for future in as_completed(futures):
+                try:
+                    yield finish(future.result())
+                except Exception as e:
+                    yield finish(SymbolResult(futures[future], error=str(e)))
+        return
+
+    # Cap symbols in flight so a large universe is never fully resident in memory
+    max_in_flight = io_workers + 2 * workers
+    pending = iter(symbols)
+    loading = {}
+    running = {}
+    load_times = {}
+
+    io_pool = ThreadPoolExecutor(io_workers)
+    cpu_pool = ProcessPoolExecutor(workers)
+    try:
+        while True:
+            while len(loading) < io_workers and len(loading) + len(running) < max_in_flight:
+                symbol = next(pending, None)
+                if symbol is None:
+                    break
+                loading[io_pool.submit(timed_load, loader, symbol)] = symbol
+            if not loading and not running:
+                break
+
+            done, _ = wait(list(loading) + list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in loading:
+                    symbol = loading.pop(future)
+                    try:
+                        data, load_times[symbol] = future.result()
+                    except Exception as e:
+                        yield finish(SymbolResult(symbol, error=str(e)))
+                        continue
+                    version = key = None
+                    if result_store is not None:
+                        # Cache hits never reach the process pool, so their frames are not pickled; misses
+                        # hand the version and key to the worker rather than hashing the data again
+                        version = data_version(data)
+                        key = result_key(version, config_key(strategies, holding_days, exit_rules))
+                        cached = cached_result(symbol, key, result_store)
+                        if cached is not None:
+                            cached.timings["load"] = load_times.pop(symbol)
+                            yield finish(cached)
+                            continue
+                    running[cpu_pool.submit(evaluate_symbol, symbol, data, strategies, holding_days,
+                                            profile_path(symbol), result_store, exit_rules, version, key)] = symbol
+                else:
+                    symbol = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = SymbolResult(symbol, error=str(e))
+                    result.timings["load"] = load_times.pop(symbol)
+                    yield finish(result)
+    finally:
+        io_pool.shutdown(cancel_futures=True)
+        cpu_pool.shutdown(cancel_futures=True)
+
+
+class SweepJob:
+    # Runs run_sweep on a background thread so a UI can poll progress and partial results while the
+    # sweep keeps going; all run_sweep keyword arguments are passed through.
+    def __init__(self, symbols, strategies, **sweep_args):
+        self.symbols = list(symbols)
+        self.strategies = strategies
+        self.sweep_args = sweep_args
+        self.results = []
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        # Stops after the result in progress; run_sweep's pools are shut down when the generator closes
+        self._cancelled.set()
+
+    def _run(self):
+        sweep = run_sweep(self.symbols, self.strategies, **self.sweep_args)
+        try:
+            for result in sweep:
+                with self._lock:
+                    self.results.append(result)
+                if self._cancelled.is_set():
+                    break
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            sweep.close()
+            self.finished = time.perf_counter()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def progress(self):
+        # Snapshot for polling: counts, elapsed seconds, throughput (symbols/s) and ETA in seconds
+        with self._lock:
+            done = len(self.results)
+            failed = sum(result.error is not None for result in self.results)
+        elapsed = ((self.finished or time.perf_counter()) - self.started) if self.started is not None else 0.0
+        throughput = done / elapsed if elapsed > 0 else 0.0
+        remaining = len(self.symbols) - done
+        return {
+            "total": len(self.symbols),
+            "done": done,
+            "failed": failed,
+            "elapsed": elapsed,
+            "throughput": throughput,
+            "eta": remaining / throughput if throughput > 0 and self.running else None,
+        }
+
+    def snapshot(self):
+        # Copy of the results so far, safe to read while the sweep is running
+        with self._lock:
+            return list(self.results)
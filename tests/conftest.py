@@ -0,0 +1,27 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_bars(n=1300, seed=0, start='2020-06-01'):
+    # Random-walk daily OHLCV bars
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, n)))
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.005, n)),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.lognormal(12, 0.6, n).round(),
+    }, index=pd.DatetimeIndex(pd.bdate_range(start, periods=n), name='Date'))
+
+
+@pytest.fixture
+def bars():
+    return synthetic_bars
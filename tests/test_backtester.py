@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import backtest_fixed_holding, backtest_fixed_holding_loop, fixed_holding_trades
+
+HOLDING_DAYS = [1, 3, 5, 20]
+
+
+def random_signals(index, seed, density=0.1, nan_fraction=0.0):
+    rng = np.random.default_rng(seed)
+    signal = np.where(rng.random(len(index)) < density, rng.choice([-1, 1], len(index)), 0).astype(np.float64)
+    signal[rng.random(len(index)) < nan_fraction] = np.nan
+    return pd.DataFrame({'signal': signal if nan_fraction else signal.astype(np.int64)}, index=index)
+
+
+def assert_same_trades(data, signals, holding_days, initial_capital=100000):
+    expected = backtest_fixed_holding_loop(data, signals, holding_days, initial_capital)
+    actual = backtest_fixed_holding(data, signals, holding_days, initial_capital)
+    if expected.empty:
+        assert actual.empty
+        return
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected, check_dtype=False, check_exact=True)
+
+
+@pytest.mark.parametrize('holding_days', HOLDING_DAYS)
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('density', [0.02, 0.3, 1.0])
+def test_matches_the_loop(bars, holding_days, seed, density):
+    data = bars(n=600, seed=seed)
+    assert_same_trades(data, random_signals(data.index, seed, density), holding_days)
+
+
+@pytest.mark.parametrize('holding_days', HOLDING_DAYS)
+def test_nan_signals_are_ignored(bars, holding_days):
+    data = bars(n=600, seed=7)
+    signals = random_signals(data.index, 7, density=0.3, nan_fraction=0.2)
+    assert signals['signal'].isna().any()
+    assert_same_trades(data, signals, holding_days)
+
+
+@pytest.mark.parametrize('holding_days', HOLDING_DAYS)
+@pytest.mark.parametrize('initial_capital', [50, 120, 250])
+def test_capital_too_small_for_one_share(bars, holding_days, initial_capital):
+    # Prices start at ~100: some entries (or all) cannot buy a single share and are skipped
+    data = bars(n=600, seed=8)
+    assert_same_trades(data, random_signals(data.index, 8, density=0.3), holding_days, initial_capital)
+
+
+def test_no_trades_without_capital(bars):
+    data = bars(n=100, seed=9)
+    assert backtest_fixed_holding(data, random_signals(data.index, 9, density=1.0), 5, initial_capital=10).empty
+
+
+@pytest.mark.parametrize('holding_days', HOLDING_DAYS)
+def test_signals_near_the_end_of_the_data(bars, holding_days):
+    data = bars(n=300, seed=10)
+    signals = pd.DataFrame({'signal': 0}, index=data.index)
+    signals.iloc[-holding_days - 3:, 0] = [1, -1] * ((holding_days + 3) // 2) + [1] * ((holding_days + 3) % 2)
+    assert_same_trades(data, signals, holding_days)
+    # A signal with fewer than holding_days bars left never trades
+    trades = fixed_holding_trades(data['Close'].to_numpy(), signals['signal'].to_numpy(), holding_days)
+    assert (trades["exit_pos"] < len(data)).all()
+    assert (trades["entry_pos"] < len(data) - holding_days).all()
+
+
+def test_signals_index_wider_than_data(bars):
+    data = bars(n=400, seed=11)
+    signals = random_signals(data.index, 11, density=0.3)
+    assert_same_trades(data.iloc[50:350], signals, 5)
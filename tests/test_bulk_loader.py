@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from bulk_loader import BulkLoader
+from data_store import DataFrameProvider, OHLCVStore
+
+START, END = '2020-06-01', '2025-06-01'
+
+
+class FlakyProvider(DataFrameProvider):
+    # Fails the first `failures` requests, and can answer batches without some symbols or slowly
+    def __init__(self, frames, failures=0, omit=(), empty=(), delay=0.0):
+        super().__init__(frames)
+        self.failures = failures
+        self.omit = set(omit)
+        self.empty = set(empty)
+        self.delay = delay
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def _attempt(self):
+        with self.lock:
+            self.requests += 1
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("throttled")
+        time.sleep(self.delay)
+
+    def download(self, symbol, start, end, interval='1d'):
+        self._attempt()
+        df = super().download(symbol, start, end, interval)
+        return df.iloc[:0] if symbol in self.empty else df
+
+    def download_many(self, symbols, start, end, interval='1d'):
+        self._attempt()
+        return {symbol: DataFrameProvider.download(self, symbol, start, end, interval)
+                for symbol in symbols if symbol in self.frames and symbol not in self.omit}
+
+
+def make_loader(tmp_path, provider, **kwargs):
+    store = OHLCVStore(str(tmp_path / 'cache'), provider)
+    kwargs.setdefault('checkpoint', str(tmp_path / 'checkpoint.json'))
+    return BulkLoader(store, rate=1000, sleep=lambda seconds: None, **kwargs), store
+
+
+def assert_cached(store, frame, symbol):
+    cached = store.read(symbol)
+    expected = frame.loc[(frame.index >= START) & (frame.index < END)]
+    pd.testing.assert_frame_equal(cached, expected, check_freq=False)
+    assert store.coverage(symbol) == (pd.Timestamp(START), pd.Timestamp(END))
+
+
+def test_retries_until_the_provider_recovers(tmp_path, bars):
+    frames = {'A.NS': bars(seed=1)}
+    provider = FlakyProvider(frames, failures=2)
+    loader, store = make_loader(tmp_path, provider, retries=3)
+    report = loader.load(list(frames), START, END)
+    assert report['loaded'] == ['A.NS'] and not report['failed']
+    assert provider.requests == 3
+    assert_cached(store, frames['A.NS'], 'A.NS')
+
+
+def test_gives_up_after_the_last_retry(tmp_path, bars):
+    provider = FlakyProvider({'A.NS': bars(seed=1)}, failures=10)
+    loader, store = make_loader(tmp_path, provider, retries=2)
+    report = loader.load(['A.NS'], START, END)
+    assert report['failed']['A.NS']['attempts'] == 3
+    assert provider.requests == 3
+    assert store.coverage('A.NS') is None
+
+
+def test_symbols_missing_from_a_batch_are_fetched_alone(tmp_path, bars):
+    frames = {f'S{i}.NS': bars(seed=i) for i in range(5)}
+    provider = FlakyProvider(frames, omit={'S2.NS'})
+    loader, store = make_loader(tmp_path, provider, batch_size=5)
+    report = loader.load(list(frames), START, END)
+    assert sorted(report['loaded']) == sorted(frames)
+    assert ('S2.NS', START, END, '1d') in provider.calls
+    for symbol, frame in frames.items():
+        assert_cached(store, frame, symbol)
+
+
+def test_empty_answers_are_failures_and_not_cached(tmp_path, bars):
+    provider = FlakyProvider({'A.NS': bars(seed=1)}, empty={'A.NS'})
+    loader, store = make_loader(tmp_path, provider)
+    report = loader.load(['A.NS'], START, END)
+    assert report['failed']['A.NS']['error'] == "No data returned"
+    assert store.coverage('A.NS') is None and store.read('A.NS') is None
+
+
+def test_a_symbol_the_store_cannot_write_fails_alone(tmp_path, bars):
+    frames = {f'S{i}.NS': bars(seed=i) for i in range(4)}
+    frames['S1.NS'] = frames['S1.NS'].drop(columns='Close')
+    loader, store = make_loader(tmp_path, FlakyProvider(frames), batch_size=4)
+    report = loader.load(list(frames), START, END)
+    assert sorted(report['loaded']) == ['S0.NS', 'S2.NS', 'S3.NS']
+    assert report['failed']['S1.NS']['error'].startswith("Storing failed: ")
+    assert store.coverage('S1.NS') is None
+    for symbol in report['loaded']:
+        assert_cached(store, frames[symbol], symbol)
+
+
+def test_resume_loads_the_range_an_interrupted_run_missed(tmp_path, bars):
+    frame = bars(seed=1)
+    store = OHLCVStore(str(tmp_path / 'cache'), DataFrameProvider({'A.NS': frame}))
+    store.refresh('A.NS', '2021-06-01', '2023-06-01')
+
+    # First run dies (e.g. killed) while the tail range is in flight, after the head range has loaded
+    class Interrupted(BaseException):
+        pass
+
+    class TailInterrupted(FlakyProvider):
+        def download(self, symbol, start, end, interval='1d'):
+            if start >= '2023-06-01':
+                time.sleep(0.05)
+                raise Interrupted()
+            return super().download(symbol, start, end, interval)
+
+    store.provider = TailInterrupted({'A.NS': frame})
+    loader = BulkLoader(store, workers=2, rate=1000, sleep=lambda seconds: None,
+                        checkpoint=str(tmp_path / 'checkpoint.json'))
+    with pytest.raises(Interrupted):
+        loader.load(['A.NS'], START, END)
+
+    store.provider = DataFrameProvider({'A.NS': frame})
+    report = loader.load(['A.NS'], START, END)
+    assert report['loaded'] == ['A.NS']
+    assert store.provider.calls == [('A.NS', '2023-06-01', END, '1d')]
+    assert_cached(store, frame, 'A.NS')
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_concurrent_head_and_tail_batches_of_one_symbol(tmp_path, bars, batch_size):
+    frames = {f'S{i}.NS': bars(seed=i) for i in range(6)}
+    store = OHLCVStore(str(tmp_path / 'cache'), DataFrameProvider(frames))
+    for symbol in frames:
+        store.refresh(symbol, '2021-06-01', '2023-06-01')
+
+    provider = FlakyProvider(frames, delay=0.01)
+    loader, store = make_loader(tmp_path, provider, workers=4, batch_size=batch_size)
+    report = loader.load(list(frames), START, END)
+    assert sorted(report['loaded']) == sorted(frames) and not report['failed']
+    for symbol, frame in frames.items():
+        assert_cached(store, frame, symbol)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+from data_store import DataFrameProvider, OHLCVStore
+
+
+def reference_merge(existing, new):
+    # The whole-file concat / dedupe / sort that merge() streams
+    df = pd.concat([existing, new])
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+@pytest.mark.parametrize('row_group', [7, 100, 100_000])
+@pytest.mark.parametrize('new_range', [(0, 150), (900, 1300), (300, 600), (0, 1300), (250, 260)])
+def test_merge_matches_a_full_rewrite(tmp_path, bars, monkeypatch, row_group, new_range):
+    monkeypatch.setattr(data_store, 'ROW_GROUP_SIZE', row_group)
+    frame = bars(seed=3)
+    frame['Volume'] = frame['Volume'].astype('int64')
+    existing = frame.iloc[200:800]
+    new = frame.iloc[new_range[0]:new_range[1]].copy()
+    new['Close'] *= 1.5  # overlapping bars must be replaced by the new ones
+    store = OHLCVStore(str(tmp_path))
+    store.write('A.NS', existing, existing.index[0], existing.index[-1])
+
+    store.merge('A.NS', new)
+    merged = store.read('A.NS')
+    pd.testing.assert_frame_equal(merged, reference_merge(existing, new), check_freq=False)
+    assert list(store.iter_chunks('A.NS', chunk_rows=50))  # still streamable
+
+
+def test_refresh_does_not_load_the_cached_file(tmp_path, bars, monkeypatch):
+    frame = bars(seed=4)
+    store = OHLCVStore(str(tmp_path), DataFrameProvider({'A.NS': frame}))
+    store.refresh('A.NS', '2021-01-01', '2022-01-01')
+
+    def no_read(*args, **kwargs):
+        raise AssertionError("refresh read the whole file")
+
+    monkeypatch.setattr(store, 'read', no_read)
+    monkeypatch.setattr(pd, 'read_parquet', no_read)
+    assert store.refresh('A.NS', '2020-06-01', '2023-01-01') > 0
+    monkeypatch.undo()
+    expected = frame.loc[(frame.index >= '2020-06-01') & (frame.index < '2023-01-01')]
+    pd.testing.assert_frame_equal(store.read('A.NS'), expected, check_freq=False)
+    assert store.coverage('A.NS') == (pd.Timestamp('2020-06-01'), pd.Timestamp('2023-01-01'))
+
+
+def test_empty_downloads_are_requested_again(tmp_path, bars):
+    frame = bars(seed=5)
+    provider = DataFrameProvider({'A.NS': frame.iloc[:0]})
+    store = OHLCVStore(str(tmp_path), provider)
+    assert store.load('A.NS', '2021-01-01', '2022-01-01').empty
+    assert store.coverage('A.NS') is None
+
+    provider.frames['A.NS'] = frame
+    loaded = store.load('A.NS', '2021-01-01', '2022-01-01')
+    assert len(loaded) == np.count_nonzero((frame.index >= '2021-01-01') & (frame.index < '2022-01-01'))
@@ -0,0 +1,127 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import backtest_fixed_holding
+from conftest import synthetic_bars
+from exit_rules import backtest_exit_rules
+from indicators import atr
+
+
+def gappy_bars(seed, n=400):
+    # Opens away from the previous close (so bars gap through levels) and wide High/Low ranges around them
+    data = synthetic_bars(n=n, seed=seed)
+    rng = np.random.default_rng(seed + 100)
+    data['Open'] = data['Close'].shift(1).fillna(data['Close']) * (1 + rng.normal(0, 0.015, n))
+    body_high = np.maximum(data['Open'], data['Close'])
+    body_low = np.minimum(data['Open'], data['Close'])
+    data['High'] = body_high * (1 + rng.exponential(0.01, n))
+    data['Low'] = body_low * (1 - rng.exponential(0.01, n))
+    return data
+
+
+def random_signals(index, seed, density=0.15):
+    rng = np.random.default_rng(seed)
+    signal = np.where(rng.random(len(index)) < density, rng.choice([-1, 1], len(index)), 0)
+    return pd.DataFrame({'signal': signal}, index=index)
+
+
+def reference_exit_rules(data, signals, holding_days, stop_loss_pct=None, take_profit_pct=None,
+                         trailing_stop_pct=None, atr_stop=None, atr_period=14, initial_capital=100000):
+    # Bar-by-bar walk: enter at the signal bar's close, then on each later bar check the tightest stop (fixed
+    # percentage or ATR stop, or the trailing stop off the best price of the previous bars) before the target,
+    # filling at the open when the bar gaps through the level; otherwise exit at the close holding_days later
+    open_, high, low, close = (data[column].to_numpy() for column in ('Open', 'High', 'Low', 'Close'))
+    signal = signals.loc[data.index, 'signal'].to_numpy()
+    atr_values = atr(data['High'], data['Low'], data['Close'], atr_period).to_numpy()
+    n, capital, rows, i = len(close), initial_capital, [], 0
+    while i + holding_days < n:
+        side = signal[i]
+        qty = capital // close[i]
+        if side not in (1, -1) or qty == 0:
+            i += 1
+            continue
+        price = close[i]
+        distance, fixed_reason = np.inf, "time"
+        if stop_loss_pct is not None:
+            distance, fixed_reason = price * (stop_loss_pct / 100.0), "stop_loss"
+        if atr_stop is not None and atr_values[i] * atr_stop < distance:
+            distance, fixed_reason = atr_values[i] * atr_stop, "atr_stop"
+        fixed = price - distance if side == 1 else price + distance
+        target = None if take_profit_pct is None else price * (1 + side * take_profit_pct / 100.0)
+        best = price
+        for bar in range(i + 1, i + holding_days + 1):
+            stop, reason = fixed, fixed_reason
+            if trailing_stop_pct is not None:
+                offset = best * (trailing_stop_pct / 100.0)
+                trail = best - offset if side == 1 else best + offset
+                if (side == 1 and trail > stop) or (side == -1 and trail < stop):
+                    stop, reason = trail, "trailing_stop"
+            if side == 1 and low[bar] <= stop:
+                fill = min(open_[bar], stop)
+            elif side == -1 and high[bar] >= stop:
+                fill = max(open_[bar], stop)
+            elif target is not None and side == 1 and high[bar] >= target:
+                fill, reason = max(open_[bar], target), "take_profit"
+            elif target is not None and side == -1 and low[bar] <= target:
+                fill, reason = min(open_[bar], target), "take_profit"
+            elif bar == i + holding_days:
+                fill, reason = close[bar], "time"
+            else:
+                best = max(best, high[bar]) if side == 1 else min(best, low[bar])
+                continue
+            break
+        pnl = (fill - price) * side * qty
+        capital += pnl
+        rows.append({"Signal": "BUY" if side == 1 else "SELL", "Entry Date": data.index[i], "Entry Price": price,
+                     "Exit Date": data.index[bar], "Exit Price": fill, "PnL": pnl,
+                     "Return (%)": pnl / (qty * price) * 100, "Capital Deployed": qty * price, "Equity": capital,
+                     "Exit Reason": reason})
+        i = bar + 1
+    return pd.DataFrame(rows)
+
+
+RULES = [dict(zip(("stop_loss_pct", "take_profit_pct", "trailing_stop_pct", "atr_stop"), values))
+         for values in itertools.product((None, 2.0), (None, 3.0), (None, 1.5), (None, 1.0))]
+
+
+@pytest.mark.parametrize('rules', RULES, ids=lambda rules: "-".join(f"{k}={v}" for k, v in rules.items() if v)
+                         or "none")
+@pytest.mark.parametrize('holding_days', [1, 5, 20])
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_the_bar_by_bar_reference(rules, holding_days, seed):
+    data = gappy_bars(seed)
+    signals = random_signals(data.index, seed)
+    rules = {name: value for name, value in rules.items() if value is not None}
+    expected = reference_exit_rules(data, signals, holding_days, **rules)
+    actual = backtest_exit_rules(data, signals, holding_days, **rules)
+    assert len(expected)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('holding_days', [1, 5, 20])
+@pytest.mark.parametrize('seed', range(3))
+def test_no_rules_is_the_fixed_holding_backtest(holding_days, seed):
+    data = gappy_bars(seed)
+    signals = random_signals(data.index, seed)
+    actual = backtest_exit_rules(data, signals, holding_days)
+    assert (actual["Exit Reason"] == "time").all()
+    pd.testing.assert_frame_equal(actual.drop(columns="Exit Reason"),
+                                  backtest_fixed_holding(data, signals, holding_days), check_exact=True)
+
+
+def bars_of(rows):
+    index = pd.bdate_range('2024-01-01', periods=len(rows), name='Date')
+    return pd.DataFrame(rows, columns=['Open', 'High', 'Low', 'Close'], index=index).assign(Volume=1e5)
+
+
+def test_stop_is_checked_before_the_target_and_gaps_fill_at_the_open():
+    data = bars_of([(100, 100, 100, 100), (100, 110, 90, 100), (100, 100, 100, 100),
+                    (100, 100, 100, 100), (90, 91, 85, 88), (88, 88, 88, 88)])
+    signals = pd.DataFrame({'signal': [1, 0, 1, 0, 0, 0]}, index=data.index)
+    trades = backtest_exit_rules(data, signals, holding_days=2, stop_loss_pct=5, take_profit_pct=5)
+    # Bar 1 touches both levels: the stop wins. Bar 4 opens below the stop: filled at the open, not at 95.
+    assert trades["Exit Reason"].tolist() == ["stop_loss", "stop_loss"]
+    assert trades["Exit Price"].tolist() == [95.0, 90.0]
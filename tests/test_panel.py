@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import backtest_fixed_holding, backtest_fixed_holding_panel
+from panel import generate_panel_signals, load_panel
+from strategies import STRATEGIES
+from sweep import generate_strategy_signals
+
+
+@pytest.fixture
+def frames(bars):
+    full = bars(seed=20)
+    gapped = bars(seed=21)
+    late = bars(n=900, seed=22, start='2021-03-01')
+    return {
+        'FULL.NS': full,
+        'GAP.NS': gapped.drop(gapped.index[[400, 401, 402, 700]]),  # interior bars missing
+        'LATE.NS': late,  # starts and ends later than the others
+        'HOLES.NS': full.iloc[::3],  # most union dates missing
+    }
+
+
+@pytest.mark.parametrize('name', [*STRATEGIES, 'all'])
+def test_gapped_symbols_match_the_per_symbol_run(frames, name):
+    strategies = list(STRATEGIES.values()) if name == 'all' else [STRATEGIES[name]]
+    panel = load_panel(list(frames), loader=frames.__getitem__)
+    assert sorted(panel.symbols[j] for j in panel.gapped_columns()) == ['GAP.NS', 'HOLES.NS']
+    signals = generate_panel_signals(panel, strategies)
+    trades = backtest_fixed_holding_panel(panel, signals, holding_days=5)
+
+    for j, symbol in enumerate(panel.symbols):
+        data = frames[symbol]
+        expected = generate_strategy_signals(data, strategies)
+        rows = panel.dates.get_indexer(data.index)
+        np.testing.assert_array_equal(signals[rows, j], expected['signal'].to_numpy())
+        assert not signals[np.setdiff1d(np.arange(len(panel.dates)), rows), j].any()
+
+        expected_trades = backtest_fixed_holding(data, expected, holding_days=5)
+        actual_trades = trades[trades['Symbol'] == symbol].drop(columns='Symbol').reset_index(drop=True)
+        if expected_trades.empty:
+            assert actual_trades.empty
+        else:
+            pd.testing.assert_frame_equal(actual_trades, expected_trades, check_dtype=False, check_names=False)
@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from backtester import backtest_fixed_holding
+from breakout_52w import Breakout52Week
+from conftest import synthetic_bars
+from macd_strategy import MACDStrategy
+from result_store import ResultStore, config_key, data_version
+from sweep import generate_strategy_signals, run_sweep
+
+SYMBOLS = ['S1.NS', 'S2.NS', 'S3.NS', 'SHORT.NS']
+
+
+def load_bars(symbol):
+    # Module-level (picklable) loader; SHORT.NS is too short for a 52-week breakout, so it has no trades
+    return synthetic_bars(n=100) if symbol == 'SHORT.NS' else synthetic_bars(seed=int(symbol[1]))
+
+
+def failing_loader(symbol):
+    raise ConnectionError("offline")
+
+
+def test_config_key_fills_in_defaults():
+    defaults = {"short_window": 12, "long_window": 26, "signal_window": 9}
+    assert config_key([(MACDStrategy, {})], 5) == config_key([(MACDStrategy, defaults)], 5)
+    assert config_key([(MACDStrategy, {})], 5, None) == config_key([(MACDStrategy, {})], 5, {})
+    assert config_key([(MACDStrategy, {})], 5) != config_key([(MACDStrategy, {"short_window": 8})], 5)
+    assert config_key([(MACDStrategy, {})], 5) != config_key([(MACDStrategy, {})], 10)
+    assert config_key([(MACDStrategy, {})], 5) != config_key([(Breakout52Week, {})], 5)
+
+
+def test_config_key_changes_with_exit_rules():
+    base = config_key([(MACDStrategy, {})], 5)
+    stop = config_key([(MACDStrategy, {})], 5, {"stop_loss_pct": 3})
+    assert len({base, stop, config_key([(MACDStrategy, {})], 5, {"stop_loss_pct": 4}),
+                config_key([(MACDStrategy, {})], 5, {"take_profit_pct": 3})}) == 4
+    assert stop == config_key([(MACDStrategy, {})], 5, {"stop_loss_pct": 3})
+
+
+def test_config_key_changes_when_rules_are_edited(monkeypatch):
+    before = config_key([(Breakout52Week, {})], 5)
+    monkeypatch.setattr(Breakout52Week, 'rules', ((1, "close >= shift(rolling_max(close, window))"),))
+    assert config_key([(Breakout52Week, {})], 5) != before
+
+
+def test_data_version_tracks_the_bars():
+    data = synthetic_bars(seed=1)
+    assert data_version(data) == data_version(data.copy())
+    edited = data.copy()
+    edited.iloc[-1, edited.columns.get_loc('Close')] += 0.01
+    assert data_version(edited) != data_version(data)
+    assert data_version(data.iloc[:-1]) != data_version(data)
+
+
+def run(store, workers, strategies=((Breakout52Week, {"window": 20}),), loader=load_bars, **kwargs):
+    results = run_sweep(SYMBOLS, list(strategies), workers=workers, io_workers=2, loader=loader,
+                        result_store=store, **kwargs)
+    return {result.symbol: result for result in results}
+
+
+@pytest.mark.parametrize('first, second', [(2, 2), (0, 2), (2, 0)])
+def test_results_are_reused_across_worker_modes(tmp_path, first, second):
+    store = ResultStore(str(tmp_path / 'results.db'))
+    computed = run(store, first)
+    assert not any(result.cached for result in computed.values())
+    cached = run(store, second)
+    assert all(result.cached for result in cached.values())
+    for symbol, result in computed.items():
+        assert cached[symbol].key == result.key
+        assert cached[symbol].error == result.error
+        assert cached[symbol].metrics == pytest.approx(result.metrics, nan_ok=True)
+    # Runs with the packed-loader path share the same keys
+    assert all(result.cached for result in run(store, 2, load_in_worker=True).values())
+
+
+def test_stored_trades_match_the_backtest(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.db'))
+    strategies = [(Breakout52Week, {"window": 20})]
+    result = run(store, 0, strategies)['S1.NS']
+    data = load_bars('S1.NS')
+    expected = backtest_fixed_holding(data, generate_strategy_signals(data, strategies), 5)
+    pd.testing.assert_frame_equal(store.trades(result.key), expected, check_dtype=False, check_freq=False)
+
+
+def test_no_trade_results_are_stored_and_load_errors_are_not(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.db'))
+    strategies = [(Breakout52Week, {})]
+    first = run(store, 0, strategies)['SHORT.NS']
+    assert first.error == "No trades to summarize." and not first.cached
+    again = run(store, 2, strategies)['SHORT.NS']
+    assert again.cached and again.error == first.error and again.trades == 0
+    assert again.cagr is None
+
+    failed = run(store, 0, strategies, loader=failing_loader)
+    assert all(result.error == "offline" and result.key is None for result in failed.values())
+    assert len(store.query(strategies=strategies, holding_days=5)) == len(SYMBOLS)
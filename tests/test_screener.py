@@ -0,0 +1,60 @@
+from functools import partial
+
+import pandas as pd
+import pytest
+
+from data_store import DataFrameProvider, OHLCVStore
+from fetch_data_module import data_stamp, fetch_data
+from strategies import STRATEGIES
+from screener import screen_universe
+
+START, END = '2020-06-01', '2025-06-01'
+WHERE = "bars >= 252 AND signals > 0"
+
+
+@pytest.fixture
+def setup(tmp_path, bars):
+    frames = {f'S{i}.NS': bars(n=200 + 200 * i, seed=i) for i in range(4)}
+    store = OHLCVStore(str(tmp_path / 'cache'), DataFrameProvider(frames))
+    loaded = []
+
+    def loader(symbol):
+        loaded.append(symbol)
+        return fetch_data(symbol, START, END, store=store)
+
+    screen = partial(screen_universe, list(frames), WHERE, strategies=[STRATEGIES['MACD Strategy']], loader=loader,
+                     path=str(tmp_path / 'screener.db'), stamp=partial(data_stamp, start=START, end=END, store=store))
+    return frames, store, loaded, screen
+
+
+def test_unchanged_symbols_are_not_loaded_again(setup):
+    frames, store, loaded, screen = setup
+    kept, failed = screen()
+    assert not failed and sorted(loaded) == sorted(frames)
+    assert kept == ['S1.NS', 'S2.NS', 'S3.NS']
+
+    loaded.clear()
+    assert screen() == (kept, {})
+    assert loaded == []
+
+
+def test_changed_symbols_are_reloaded(setup, bars):
+    frames, store, loaded, screen = setup
+    kept, _ = screen()
+    # S0 gains history: its cached file changes, the others are untouched
+    longer = bars(n=600, seed=0)
+    store.write('S0.NS', longer, pd.Timestamp(START), pd.Timestamp(END))
+
+    loaded.clear()
+    assert screen()[0] == ['S0.NS', *kept]
+    assert loaded == ['S0.NS']
+
+
+def test_uncovered_ranges_are_loaded(setup):
+    frames, store, loaded, screen = setup
+    store.refresh('S1.NS', START, '2021-01-01')
+    assert data_stamp('S1.NS', START, END, store=store) is None
+    assert data_stamp('S1.NS', START, '2021-01-01', store=store) is not None
+    screen()
+    assert 'S1.NS' in loaded
+    assert data_stamp('S1.NS', START, END, store=store) is not None
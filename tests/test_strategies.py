@@ -0,0 +1,112 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import backtest_fixed_holding
+from breakout_52w import Breakout52Week
+from conftest import synthetic_bars
+from intraday import ChunkedBacktest, backtest_chunked
+from ma_crossover import MovingAverageCrossover
+from macd_strategy import MACDStrategy
+from optimizer import GRID_FUNCTIONS
+from panel import Panel
+from rsi_strategy import RSIStrategy
+from sweep import generate_strategy_signals
+from volume_spike import VolumeSpikeStrategy
+
+# Every strategy with its default parameters and with short windows (more signals on a short history)
+CONFIGS = [
+    (Breakout52Week, {}), (Breakout52Week, {"window": 20}),
+    (MovingAverageCrossover, {}), (MovingAverageCrossover, {"short_window": 5, "long_window": 20}),
+    (RSIStrategy, {}), (RSIStrategy, {"period": 5}),
+    (VolumeSpikeStrategy, {}), (VolumeSpikeStrategy, {"volume_window": 10, "volume_threshold": 1.5}),
+    (MACDStrategy, {}), (MACDStrategy, {"short_window": 5, "long_window": 13, "signal_window": 4}),
+]
+IDS = [f"{cls.__name__}-{'-'.join(map(str, params.values())) or 'default'}" for cls, params in CONFIGS]
+
+
+def flat_bars(seed):
+    # Whole-rupee closes (many unchanged closes) and a flat stretch with constant volume
+    data = synthetic_bars(n=700, seed=seed)
+    data['Close'] = data['Close'].round(0)
+    data.iloc[300:340, data.columns.get_loc('Close')] = data['Close'].iloc[300]
+    data.iloc[300:340, data.columns.get_loc('Volume')] = 1e5
+    return data
+
+
+HISTORIES = [pytest.param(lambda seed=seed: synthetic_bars(n=700, seed=seed), id=f"random-{seed}")
+             for seed in range(3)]
+HISTORIES += [pytest.param(lambda seed=seed: flat_bars(seed), id=f"flat-{seed}") for seed in range(2)]
+
+
+def signals_of(cls, params, data):
+    return cls(data, **params).generate_signals()['signal']
+
+
+@pytest.mark.parametrize('history', HISTORIES)
+@pytest.mark.parametrize('cls, params', CONFIGS, ids=IDS)
+def test_rules_match_the_vectorized_implementations(history, cls, params):
+    data = history()
+    expected = signals_of(cls, params, data).to_numpy()
+    panel = Panel(data.index, ['X'], {field: data[[field]].to_numpy(dtype=np.float64) for field in data.columns})
+    np.testing.assert_array_equal(cls.generate_panel_signals(panel, **params)[:, 0], expected)
+    _, grid = GRID_FUNCTIONS[cls.__name__](data, **{name: (value,) for name, value in params.items()})
+    np.testing.assert_array_equal(grid[:, 0], expected)
+
+
+@pytest.mark.parametrize('history', HISTORIES)
+@pytest.mark.parametrize('cls, params', CONFIGS, ids=IDS)
+def test_streaming_matches_generate_signals(history, cls, params):
+    data = history()
+    expected = signals_of(cls, params, data)
+    strategy = cls(data, **params)
+    pd.testing.assert_series_equal(strategy.warm_up(), expected, check_dtype=False)
+
+    # Saved after part of the history and resumed from JSON, the remaining bars stream to the same signals
+    split = len(data) // 2
+    head = cls(data.iloc[:split], **params)
+    head.warm_up()
+    resumed = cls.from_state(json.loads(json.dumps(head.get_state())))
+    tail = [resumed.update({'Close': close, 'Volume': volume})
+            for close, volume in zip(data['Close'].iloc[split:].tolist(), data['Volume'].iloc[split:].tolist())]
+    np.testing.assert_array_equal(tail, expected.iloc[split:].to_numpy())
+
+
+def chunks_of(data, chunk_rows):
+    return [data.iloc[i:i + chunk_rows] for i in range(0, len(data), chunk_rows)]
+
+
+@pytest.mark.parametrize('chunk_rows', [5, 64, 1000])
+@pytest.mark.parametrize('history', HISTORIES[::2])
+@pytest.mark.parametrize('cls, params', CONFIGS, ids=IDS)
+def test_chunked_signals_and_trades_match_one_run(history, cls, params, chunk_rows):
+    # 5-bar chunks are shorter than every lookback(), so carries span several chunks
+    data = history().iloc[:400]
+    expected = signals_of(cls, params, data)
+    carry, parts = None, []
+    for chunk in chunks_of(data, chunk_rows):
+        signals, carry = cls.chunk_signals(chunk, carry, **params)
+        parts.append(signals['signal'])
+    pd.testing.assert_series_equal(pd.concat(parts), expected, check_dtype=False)
+
+    for holding_days in (1, 5):
+        backtest = ChunkedBacktest(holding_days)
+        trades = [backtest.feed(chunk.index, chunk['Close'].to_numpy(), signals.to_numpy())
+                  for chunk, signals in zip(chunks_of(data, chunk_rows), parts)]
+        trades = pd.concat([table for table in trades if len(table)] or [pd.DataFrame()], ignore_index=True)
+        reference = backtest_fixed_holding(data, expected.to_frame(), holding_days)
+        if reference.empty:
+            assert trades.empty
+        else:
+            pd.testing.assert_frame_equal(trades, reference, check_dtype=False)
+
+
+@pytest.mark.parametrize('chunk_rows', [7, 250])
+def test_chunked_run_of_combined_strategies(chunk_rows):
+    data = flat_bars(5)
+    strategies = [CONFIGS[1], CONFIGS[5], CONFIGS[9]]
+    reference = backtest_fixed_holding(data, generate_strategy_signals(data, strategies), 5)
+    pd.testing.assert_frame_equal(backtest_chunked(chunks_of(data, chunk_rows), strategies, 5), reference,
+                                  check_dtype=False)
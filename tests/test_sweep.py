@@ -0,0 +1,31 @@
+import logging
+
+import pytest
+
+from conftest import synthetic_bars
+from strategies import STRATEGIES
+from sweep import run_sweep
+
+SYMBOLS = ['S1.NS', 'S2.NS', 'S3.NS']
+
+
+def load_bars(symbol):
+    # Module-level (picklable) loader: one deterministic history per symbol
+    return synthetic_bars(seed=int(symbol[1]))
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_info_logging_reports_signals_and_summary_per_symbol(caplog, workers):
+    with caplog.at_level(logging.INFO):
+        results = list(run_sweep(SYMBOLS, [STRATEGIES['MACD Strategy']], workers=workers, io_workers=2,
+                                 loader=load_bars))
+    messages = [record.getMessage() for record in caplog.records]
+    for result in results:
+        assert any(m.startswith(f"📊 {result.symbol} signals: ") for m in messages)
+        assert any(m.startswith(f"📊 Performance Summary ({result.symbol}):") for m in messages)
+
+
+def test_quiet_without_info_logging(caplog):
+    with caplog.at_level(logging.WARNING):
+        list(run_sweep(SYMBOLS, [STRATEGIES['MACD Strategy']], workers=0, loader=load_bars))
+    assert not caplog.records
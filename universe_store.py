@@ -0,0 +1,126 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from data_store import OHLCV_COLUMNS
+from fetch_data_module import fetch_data
+
+logger = logging.getLogger(__name__)
+
+# Packed, read-only universe layout (one directory):
+#   ohlcv.f8     float64 (fields x rows): each field is one contiguous run of every symbol's bars
+#   row_dates.i4 int32 per row: position of the row's date on the shared date axis
+#   dates.i8     int64 shared date axis (datetime64[ns])
+#   index.json   symbol -> [start row, end row), field order and sizes
+# Per-symbol frames are zero-copy views into the memory map, so any number of worker processes
+# share one copy of the data through the OS page cache.
+
+_open_stores = {}
+
+
+def open_universe_store(path):
+    # One memory map per store per process; also what pickled stores unpickle to in workers
+    path = os.path.abspath(path)
+    if path not in _open_stores:
+        _open_stores[path] = UniverseStore(path)
+    return _open_stores[path]
+
+
+class UniverseStore:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        with open(os.path.join(self.path, "index.json")) as f:
+            self.index = json.load(f)
+        self.fields = self.index["fields"]
+        rows, n_dates = self.index["rows"], self.index["dates"]
+        self.values = np.memmap(os.path.join(self.path, "ohlcv.f8"), dtype=np.float64, mode="r",
+                                shape=(len(self.fields), rows)) if rows else np.empty((len(self.fields), 0))
+        self.row_dates = np.memmap(os.path.join(self.path, "row_dates.i4"), dtype=np.int32, mode="r",
+                                   shape=(rows,)) if rows else np.empty(0, dtype=np.int32)
+        self.dates = pd.DatetimeIndex(np.fromfile(os.path.join(self.path, "dates.i8"), dtype=np.int64,
+                                                  count=n_dates).view("datetime64[ns]"), name="Date")
+
+    def __reduce__(self):
+        # Ship only the path to worker processes; they map the files themselves
+        return open_universe_store, (self.path,)
+
+    @property
+    def symbols(self):
+        return list(self.index["symbols"])
+
+    def load(self, symbol):
+        if symbol not in self.index["symbols"]:
+            raise KeyError(f"{symbol} is not in the universe store at {self.path}")
+        start, end = self.index["symbols"][symbol]
+        index = self.dates[self.row_dates[start:end]]
+        # values[:, start:end].T has exactly the (fields x rows) block layout pandas uses, so no copy is made
+        return pd.DataFrame(self.values[:, start:end].T, index=index, columns=self.fields, copy=False)
+
+    __call__ = load
+
+    def stamp(self, symbol):
+        # Cheap version of load(symbol) for the screener: the store is rebuilt, never changed in place
+        if symbol not in self.index["symbols"]:
+            return None
+        mtime = os.stat(os.path.join(self.path, "index.json")).st_mtime_ns
+        return hashlib.sha1(repr((self.path, mtime, symbol, self.index["symbols"][symbol])).encode()).hexdigest()
+
+
+def build_universe_store(path, symbols, loader=fetch_data):
+    os.makedirs(path, exist_ok=True)
+    field_files = [open(os.path.join(path, f"{field}.tmp"), "wb") for field in OHLCV_COLUMNS]
+    dates_file = open(os.path.join(path, "row_dates.tmp"), "wb")
+    offsets = {}
+    rows = 0
+    try:
+        # Symbols are appended one at a time, so building never holds more than one frame in memory
+        for symbol in symbols:
+            try:
+                data = loader(symbol)
+            except Exception as e:
+                logger.warning("Error loading %s: %s", symbol, e)
+                continue
+            if data.empty:
+                continue
+            for f, field in zip(field_files, OHLCV_COLUMNS):
+                data[field].to_numpy(dtype=np.float64).tofile(f)
+            data.index.to_numpy(dtype="datetime64[ns]").view(np.int64).tofile(dates_file)
+            offsets[symbol] = [rows, rows + len(data)]
+            rows += len(data)
+    finally:
+        for f in field_files + [dates_file]:
+            f.close()
+
+    with open(os.path.join(path, "ohlcv.f8"), "wb") as out:
+        for field in OHLCV_COLUMNS:
+            with open(os.path.join(path, f"{field}.tmp"), "rb") as f:
+                shutil.copyfileobj(f, out)
+            os.remove(os.path.join(path, f"{field}.tmp"))
+
+    row_dates = np.fromfile(os.path.join(path, "row_dates.tmp"), dtype=np.int64)
+    os.remove(os.path.join(path, "row_dates.tmp"))
+    dates = np.unique(row_dates)
+    dates.tofile(os.path.join(path, "dates.i8"))
+    np.searchsorted(dates, row_dates).astype(np.int32).tofile(os.path.join(path, "row_dates.i4"))
+
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump({"fields": OHLCV_COLUMNS, "rows": rows, "dates": len(dates), "symbols": offsets}, f)
+    _open_stores.pop(os.path.abspath(path), None)
+    return open_universe_store(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack a symbol universe into a memory-mapped store.")
+    parser.add_argument("symbols_csv", help="CSV file with a 'Symbol' column (e.g. nifty50.csv)")
+    parser.add_argument("path", help="Output directory for the store")
+    args = parser.parse_args()
+
+    symbols = pd.read_csv(args.symbols_csv, usecols=['Symbol'])['Symbol'].dropna().unique().tolist()
+    store = build_universe_store(args.path, symbols)
+    print(f"[INFO] Packed {len(store.symbols)} symbols, {store.index['rows']} rows into {args.path}")
@@ -1,22 +1,47 @@
+from collections import deque
+
+import numpy as np
 import pandas as pd
+from indicators import window_mean
 from strategy_base import Strategy
 
 class VolumeSpikeStrategy(Strategy):
+    param_names = ('volume_window', 'volume_threshold')
+    # Volume spike confirmed by the close: up on the previous close buys, otherwise sells
+    rules = ((1, "volume > volume_threshold * sma(volume, volume_window) and close > shift(close)"),
+             (-1, "volume > volume_threshold * sma(volume, volume_window) and not close > shift(close)"))
+
     def __init__(self, data: pd.DataFrame, volume_window: int = 20, volume_threshold: float = 2.0):
         super().__init__(data)
         self.volume_window = volume_window
         self.volume_threshold = volume_threshold
 
-    def generate_signals(self):
-        avg_volume = self.data['Volume'].rolling(window=self.volume_window).mean()
-        volume_spike = self.data['Volume'] > self.volume_threshold * avg_volume
+    def lookback(self):
+        # The rest of the volume window and the previous close
+        return max(self.volume_window - 1, 1)
+
+    @classmethod
+    def generate_panel_signals(cls, panel, volume_window: int = 20, volume_threshold: float = 2.0):
+        volume = panel.frame('Volume')
+        close = panel.frame('Close')
+        volume_spike = (volume > volume_threshold * volume.rolling(window=volume_window).mean()).to_numpy()
+        price_momentum = (close > close.shift(1)).to_numpy()
+
+        signals = np.zeros(panel.shape, dtype=np.int8)
+        signals[volume_spike & price_momentum] = 1
+        signals[~price_momentum & volume_spike] = -1
+        return signals
 
-        # Price confirmation: Close price > previous day's Close
-        price_momentum = self.data['Close'] > self.data['Close'].shift(1)
+    def initial_state(self):
+        return {"volumes": deque(maxlen=self.volume_window), "prev_close": None}
 
-        self.signals['signal'] = 0
-        self.signals.loc[volume_spike & price_momentum, 'signal'] = 1
-        self.signals.loc[~price_momentum & volume_spike, 'signal'] = -1
+    def update(self, bar):
+        state = self.state
+        state["volumes"].append(bar['Volume'])
+        avg_volume = window_mean(state["volumes"], self.volume_window)
+        price_momentum = state["prev_close"] is not None and bar['Close'] > state["prev_close"]
+        state["prev_close"] = bar['Close']
 
-        print(f"\n📊 Volume Spike Strategy: {self.signals['signal'].value_counts().to_dict()}")
-        return self.signals
+        if avg_volume is None or not bar['Volume'] > self.volume_threshold * avg_volume:
+            return 0
+        return 1 if price_momentum else -1
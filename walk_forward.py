@@ -0,0 +1,99 @@
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtester import fixed_holding_trades
+from fetch_data_module import fetch_data
+from metrics import array_metrics
+from sweep import generate_strategy_signals
+
+logger = logging.getLogger(__name__)
+
+PERIOD_UNITS = {"y": "years", "m": "months", "w": "weeks", "d": "days"}
+
+
+def parse_period(period):
+    # "2y", "6m", "3m", "10d" -> DateOffset
+    match = re.fullmatch(r"(\d+)\s*([ymwd])", str(period).strip().lower())
+    if not match:
+        raise ValueError(f"Invalid period {period!r}; use e.g. '2y', '6m', '3w' or '10d'.")
+    return pd.DateOffset(**{PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def make_windows(dates, train="2y", test="6m", step="3m"):
+    # (train start, test start, test end) triples; the train window ends where the test window starts
+    train, test, step = parse_period(train), parse_period(test), parse_period(step)
+    windows = []
+    train_start = dates[0]
+    while train_start + train + test <= dates[-1] + pd.Timedelta(days=1):
+        windows.append((train_start, train_start + train, train_start + train + test))
+        train_start = train_start + step
+    return windows
+
+
+def evaluate_windows(close, signal, dates, windows, holding_days=5, initial_capital=100000):
+    # Slices precomputed full-history signals per window; only the cheap backtest runs per window
+    rows = []
+    for train_start, test_start, test_end in windows:
+        row = {"Train Start": train_start, "Test Start": test_start, "Test End": test_end}
+        for label, start, end in (("Train", train_start, test_start), ("Test", test_start, test_end)):
+            lo, hi = np.searchsorted(dates, start), np.searchsorted(dates, end)
+            trades = fixed_holding_trades(close[lo:hi], signal[lo:hi], holding_days, initial_capital)
+            stats = array_metrics(trades, dates[lo:hi], initial_capital)
+            row.update({f"{label} {name}": value for name, value in stats.items()})
+        rows.append(row)
+    return rows
+
+
+def walk_forward(data, strategies, train="2y", test="6m", step="3m", holding_days=5, initial_capital=100000,
+                 workers=0):
+    # Indicators and signals are computed once over the full history (so every window starts with
+    # warmed-up indicators) and then sliced per window; workers > 0 splits the windows over processes.
+    signals = generate_strategy_signals(data, strategies)
+    close = data['Close'].to_numpy()
+    signal = signals['signal'].reindex(data.index).to_numpy()
+    dates = data.index
+    windows = make_windows(dates, train, test, step)
+
+    if workers and len(windows) > 1:
+        chunks = [chunk for chunk in np.array_split(np.arange(len(windows)), workers) if len(chunk)]
+        with ProcessPoolExecutor(len(chunks)) as pool:
+            parts = pool.map(evaluate_windows, *zip(*[
+                (close, signal, dates, [windows[i] for i in chunk], holding_days, initial_capital)
+                for chunk in chunks]))
+            rows = [row for part in parts for row in part]
+    else:
+        rows = evaluate_windows(close, signal, dates, windows, holding_days, initial_capital)
+
+    result = pd.DataFrame(rows)
+    result.index.name = "Window"
+    return result
+
+
+def _walk_forward_symbol(symbol, loader, strategies, train, test, step, holding_days, initial_capital):
+    try:
+        result = walk_forward(loader(symbol), strategies, train, test, step, holding_days, initial_capital)
+    except Exception as e:
+        logger.warning("Error processing %s: %s", symbol, e)
+        return None
+    result.insert(0, "Symbol", symbol)
+    return result.reset_index()
+
+
+def walk_forward_universe(symbols, strategies, train="2y", test="6m", step="3m", holding_days=5,
+                          initial_capital=100000, workers=None, loader=fetch_data):
+    # One task per symbol on a process pool; each loads its data and runs all of its windows
+    workers = os.cpu_count() if workers is None else workers
+    args = (loader, strategies, train, test, step, holding_days, initial_capital)
+    if workers:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_walk_forward_symbol, symbols, *[[arg] * len(symbols) for arg in args]))
+    else:
+        results = [_walk_forward_symbol(symbol, *args) for symbol in symbols]
+
+    results = [result for result in results if result is not None]
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()